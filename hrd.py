@@ -1,8 +1,18 @@
 from abc import ABC, abstractmethod
-from copy import deepcopy
+import argparse
+from collections import OrderedDict
 from dataclasses import dataclass, field
 import heapq
-from sys import argv
+import json
+import mmap
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import sqlite3
+import struct
+import sys
+import time
 from typing import *
 
 
@@ -10,11 +20,11 @@ Grid = List[List[int]]
 Cord = Tuple[int, int]
 
 
-output_symbol_map = {
-    0: 0,
-    1: 1,
-    7: 4
-}
+BOARD_ROWS = 5
+BOARD_COLS = 4
+
+# (row delta, col delta): up, down, left, right
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
 
 class PieceType:
@@ -23,7 +33,124 @@ class PieceType:
     TwoByTwo = 1
 
 
+class PieceClass:
+    # pieces of the same shape are interchangeable, so boards are stored as one
+    # bitmask per class; the values double as the output symbols of write_path
+    EMPTY = 0
+    TwoByTwo = 1
+    Horizontal = 2
+    Vertical = 3
+    OneByOne = 4
+
+
+PIECE_CLASSES = [
+    PieceClass.TwoByTwo,
+    PieceClass.Horizontal,
+    PieceClass.Vertical,
+    PieceClass.OneByOne
+]
+
+CLASS_SHAPES = {
+    PieceClass.TwoByTwo: (2, 2),
+    PieceClass.Horizontal: (1, 2),
+    PieceClass.Vertical: (2, 1),
+    PieceClass.OneByOne: (1, 1)
+}
+
+SHAPE_CLASSES = {shape: cls for cls, shape in CLASS_SHAPES.items()}
+
+BOARD_CELLS = BOARD_ROWS * BOARD_COLS
+BOARD_MASK = (1 << BOARD_CELLS) - 1
+
+# offset of each class bitmask inside a packed state key
+CLASS_SHIFTS = {cls: (cls - 1) * BOARD_CELLS for cls in PIECE_CLASSES}
+
+
+def cell_mask(
+    rows: int, cols: int, row: int, col: int, board_cols: int = BOARD_COLS
+) -> int:
+
+    mask = 0
+
+    for r in range(row, row + rows):
+        for c in range(col, col + cols):
+            mask |= 1 << (r * board_cols + c)
+
+    return mask
+
+
+# (new top-left index, new cells, cells that must be empty, cells that change,
+# change to the packed state key)
+Move = Tuple[int, int, int, int, int]
+# indexed by [class][top-left index][direction], None if off the board
+MoveTable = List[List[List[Optional[Move]]]]
+
+_move_tables: Dict[Tuple[int, int], MoveTable] = {}
+
+
+def get_move_table(board_rows: int = BOARD_ROWS, board_cols: int = BOARD_COLS) -> MoveTable:
+
+    if (board_rows, board_cols) not in _move_tables:
+        _move_tables[(board_rows, board_cols)] = _build_move_table(board_rows, board_cols)
+
+    return _move_tables[(board_rows, board_cols)]
+
+
+def _build_move_table(board_rows: int, board_cols: int) -> MoveTable:
+
+    table = [[] for _ in range(len(PIECE_CLASSES) + 1)]
+
+    for cls in PIECE_CLASSES:
+        rows, cols = CLASS_SHAPES[cls]
+        key_shift = (cls - 1) * board_rows * board_cols
+
+        for index in range(board_rows * board_cols):
+            row, col = index // board_cols, index % board_cols
+            old_mask = cell_mask(rows, cols, row, col, board_cols)
+            moves = []
+
+            for row_delta, col_delta in DIRECTIONS:
+                new_row, new_col = row + row_delta, col + col_delta
+
+                if (
+                    min(row, col, new_row, new_col) < 0
+                    or max(row, new_row) + rows > board_rows
+                    or max(col, new_col) + cols > board_cols
+                ):
+                    moves.append(None)
+                    continue
+
+                new_index = new_row * board_cols + new_col
+                new_mask = cell_mask(rows, cols, new_row, new_col, board_cols)
+                moves.append((
+                    new_index,
+                    new_mask,
+                    new_mask & ~old_mask,
+                    new_mask ^ old_mask,
+                    ((1 << index) | (1 << new_index)) << key_shift
+                ))
+
+            table[cls].append(moves)
+
+    return table
+
+
+def grid_occupancy(grid: Grid) -> int:
+
+    occupied = 0
+
+    for row in range(len(grid)):
+        for col in range(len(grid[row])):
+            if grid[row][col] != PieceType.EMPTY:
+                occupied |= 1 << (row * len(grid[row]) + col)
+
+    return occupied
+
+
 class Piece:
+
+    __slots__ = ("rows", "cols", "row", "col", "symbol")
+
     def __init__(
         self, rows: int, cols: int, row: int, col: int, symbol: int
     ) -> None:
@@ -33,40 +160,45 @@ class Piece:
         self.col = col
         self.symbol = symbol
 
+    def get_class(self) -> int:
+        return SHAPE_CLASSES[(self.rows, self.cols)]
+
+    def mask(self, board_cols: int = BOARD_COLS) -> int:
+        return cell_mask(self.rows, self.cols, self.row, self.col, board_cols)
+
     def get_moves(self, grid: Grid) -> List[Grid]:
 
         successors = []
+        board_cols = len(grid[0])
         old_cords = (self.row, self.col)
 
-        for row_delta, col_delta in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            new_cords = (self.row + row_delta, self.col + col_delta)
-            new_grid = self._move(grid, old_cords, new_cords)
-            if new_grid:
-                successors.append(new_grid)
-
-        return successors
-
-    def _move(self, grid: Grid, old_cords: Cord, new_cords: Cord) -> Optional[Grid]:
+        for new_mask in self.get_board_moves(grid_occupancy(grid), len(grid), board_cols):
+            index = (new_mask & -new_mask).bit_length() - 1
+            new_cords = (index // board_cols, index % board_cols)
 
-        for row in range(new_cords[0], new_cords[0] + self.rows):
-            for col in range(new_cords[1], new_cords[1] + self.cols):
+            copy = [row[:] for row in grid]
+            self._fill(copy, old_cords, PieceType.EMPTY)
+            self._fill(copy, new_cords, self.symbol)
+            successors.append(copy)
 
-                if not row in range(len(grid)) or not col in range(len(grid[0])):
-                    return None
-
-                is_cell_empty = grid[row][col] == PieceType.EMPTY
-                row_inside_piece = row in range(self.row, self.row + self.rows)
-                col_inside_piece = col in range(self.col, self.col + self.cols)
+        return successors
 
-                # we can overwrite current cell if its empty or belongs to this piece
-                if not is_cell_empty and not (row_inside_piece and col_inside_piece):
-                    return None
+    def get_board_moves(
+        self,
+        occupied: int,
+        board_rows: int = BOARD_ROWS,
+        board_cols: int = BOARD_COLS
+    ) -> List[int]:
+        # cell masks this piece can slide to by one cell
+        table = get_move_table(board_rows, board_cols)
+        moves = []
 
-        copy = deepcopy(grid)
-        self._fill(copy, old_cords, PieceType.EMPTY)
-        self._fill(copy, new_cords, self.symbol)
+        for move in table[self.get_class()][self.row * board_cols + self.col]:
+            # we can overwrite cells that are empty or belong to this piece
+            if move is not None and not move[2] & occupied:
+                moves.append(move[1])
 
-        return copy
+        return moves
 
     def _fill(self, grid: Grid, top_left: Cord, symbol: int) -> Optional[Grid]:
         for row in range(top_left[0], top_left[0] + self.rows):
@@ -76,37 +208,244 @@ class Piece:
 
 class State:
 
-    id: str
-    grid: Grid
+    # millions of these live during a search, so no per-instance __dict__
+    __slots__ = ("id", "occupied", "_moved", "parent", "cost", "hval")
+
+    # top-left cell of every piece, one bitmask per PieceClass packed into a
+    # single int; equivalent boards share the same id
+    id: int
+    occupied: int
+    # (old, new) top-left cell index of the piece moved from the parent
+    _moved: Optional[Tuple[int, int]]
     parent: Optional['State']
-    cost: int = 0
-    hval: int = 0
+    cost: int
+    hval: int
 
-    def __init__(self, grid: Grid, parent: Optional['State'] = None) -> None:
-        self.grid = grid
+    def __init__(
+        self,
+        grid: Optional[Grid] = None,
+        parent: Optional['State'] = None,
+        key: Optional[int] = None,
+        occupied: Optional[int] = None,
+        moved: Optional[Tuple[int, int]] = None
+    ) -> None:
         self.parent = parent
-        self._generate_id()
+
+        if key is None:
+            key, occupied = _grid_to_key(grid)
+
+        self.id = key
+        self.occupied = occupied
+        self._moved = moved
+        self.cost = 0
+        self.hval = 0
 
     def get_priority(self) -> int:
         return self.cost + self.hval
 
-    def get_successors(self) -> List['State']:
+    def anchors(self, cls: int) -> int:
+        return self.id >> CLASS_SHIFTS[cls] & BOARD_MASK
 
-        pieces = generate_pieces(self.grid)
-        successors = []
+    def get_successors(self, multi_step: bool = False) -> List['State']:
 
-        for piece in pieces:
-            grids = piece.get_moves(self.grid)
-            for grid in grids:
-                successors.append(State(grid, self))
+        return [
+            State(parent=self, key=key, occupied=occupied, moved=(old_index, new_index))
+            for key, occupied, old_index, new_index
+            in get_neighbours(self.id, self.occupied, multi_step)
+        ]
 
-        return successors
+    def coverage(self, cls: int) -> int:
+        # every cell covered by pieces of this class
+        anchors = self.anchors(cls)
+
+        if cls == PieceClass.TwoByTwo:
+            return anchors | anchors << 1 | anchors << BOARD_COLS | anchors << (BOARD_COLS + 1)
+        if cls == PieceClass.Horizontal:
+            return anchors | anchors << 1
+        if cls == PieceClass.Vertical:
+            return anchors | anchors << BOARD_COLS
+
+        return anchors
+
+    def to_grid(self) -> Grid:
+
+        grid = [[PieceClass.EMPTY] * BOARD_COLS for _ in range(BOARD_ROWS)]
+
+        for cls in PIECE_CLASSES:
+            cells = self.coverage(cls)
+            while cells:
+                cell = cells & -cells
+                index = cell.bit_length() - 1
+                grid[index // BOARD_COLS][index % BOARD_COLS] = cls
+                cells ^= cell
+
+        return grid
+
+
+def _grid_to_key(grid: Grid) -> Tuple[int, int]:
+
+    key = 0
 
-    def _generate_id(self) -> None:
-        self.id = ""
-        for row in self.grid:
-            for col in row:
-                self.id += str(output_symbol_map[col])
+    for piece in generate_pieces(grid):
+        anchor = 1 << (piece.row * BOARD_COLS + piece.col)
+        key |= anchor << CLASS_SHIFTS[piece.get_class()]
+
+    return key, grid_occupancy(grid)
+
+
+def get_neighbours(
+    key: int, occupied: int, multi_step: bool = False
+) -> List[Tuple[int, int, int, int]]:
+
+    # only pieces next to one of the two empty cells can slide, so start
+    # from those instead of trying every piece in every direction
+    neighbours = _get_slides(key, occupied)
+
+    if not multi_step:
+        return neighbours
+
+    # keep sliding the same piece into the other empty cell, e.g. a 1x1
+    # piece going around a corner, counted as a single move
+    seen = {key}
+    seen.update(neighbour[0] for neighbour in neighbours)
+
+    for first_key, first_occupied, old_index, index in neighbours[:]:
+        for next_key, next_occupied, from_index, new_index in _get_slides(first_key, first_occupied):
+            if from_index == index and next_key not in seen:
+                neighbours.append((next_key, next_occupied, old_index, new_index))
+                seen.add(next_key)
+
+    return neighbours
+
+
+def _get_slides(key: int, occupied: int) -> List[Tuple[int, int, int, int]]:
+
+    # (key, occupied, old top-left index, new top-left index) of every one
+    # cell slide into one of the empty cells
+    slides = []
+    empty = ~occupied & BOARD_MASK
+    blanks = empty
+
+    while blanks:
+        blank = blanks & -blanks
+        blanks ^= blank
+
+        for direction, source in SLIDE_SOURCES[blank.bit_length() - 1]:
+            if empty >> source & 1:
+                continue
+
+            cls, old_index = _find_owner(key, source)
+            move = MOVE_TABLE[cls][old_index][direction]
+            if move is None:
+                continue
+
+            new_index, _, entering, changed, key_delta = move
+
+            # wide pieces need both empty cells, only report them once
+            if entering & ~empty or entering & -entering != blank:
+                continue
+
+            slides.append((key ^ key_delta, occupied ^ changed, old_index, new_index))
+
+    return slides
+
+
+def _slide_sources(index: int) -> List[Tuple[int, int]]:
+
+    # (direction, cell index) of every cell a piece can slide into this cell from
+    sources = []
+    row, col = index // BOARD_COLS, index % BOARD_COLS
+
+    for direction, (row_delta, col_delta) in enumerate(DIRECTIONS):
+        source_row, source_col = row - row_delta, col - col_delta
+        if 0 <= source_row < BOARD_ROWS and 0 <= source_col < BOARD_COLS:
+            sources.append((direction, source_row * BOARD_COLS + source_col))
+
+    return sources
+
+
+KEY_BYTES = (len(PIECE_CLASSES) * BOARD_CELLS + 7) // 8
+MOVE_TABLE = get_move_table()
+SLIDE_SOURCES = [_slide_sources(index) for index in range(BOARD_CELLS)]
+
+
+def _owner_candidates(index: int) -> List[Tuple[int, int, int]]:
+
+    # (class, top-left index, key bit) of every piece placement covering a cell
+    candidates = []
+    row, col = index // BOARD_COLS, index % BOARD_COLS
+
+    for cls in PIECE_CLASSES:
+        rows, cols = CLASS_SHAPES[cls]
+        for anchor_row in range(max(row - rows + 1, 0), min(row, BOARD_ROWS - rows) + 1):
+            for anchor_col in range(max(col - cols + 1, 0), min(col, BOARD_COLS - cols) + 1):
+                anchor_index = anchor_row * BOARD_COLS + anchor_col
+                candidates.append((cls, anchor_index, 1 << anchor_index << CLASS_SHIFTS[cls]))
+
+    return candidates
+
+
+OWNER_CANDIDATES = [_owner_candidates(index) for index in range(BOARD_CELLS)]
+
+
+def _find_owner(key: int, index: int) -> Tuple[int, int]:
+
+    # (class, top-left index) of the piece covering an occupied cell
+    for cls, anchor_index, bit in OWNER_CANDIDATES[index]:
+        if key & bit:
+            return cls, anchor_index
+
+    raise ValueError(f"no piece covers cell {index}")
+
+
+def _mirror_tables() -> List[Tuple[int, int, bytes]]:
+
+    # (first byte, end byte, translation table) runs over a little endian
+    # state id; every 4 bits are one board row of one class, and a piece of
+    # width w at column c moves to column BOARD_COLS - w - c in the mirror
+    runs: List[Tuple[int, int, bytes]] = []
+
+    for position in range(KEY_BYTES):
+        table = bytearray(256)
+
+        for value in range(256):
+            for nibble in range(2):
+                bit = position * 8 + nibble * 4
+                cls = bit // BOARD_CELLS + 1
+                width = CLASS_SHAPES[cls][1]
+
+                row = value >> nibble * 4 & 0xF
+                mirrored = 0
+                for col in range(BOARD_COLS - width + 1):
+                    if row >> col & 1:
+                        mirrored |= 1 << (BOARD_COLS - width - col)
+                table[value] |= mirrored << nibble * 4
+
+        if runs and runs[-1][2] == bytes(table):
+            runs[-1] = (runs[-1][0], position + 1, runs[-1][2])
+        else:
+            runs.append((position, position + 1, bytes(table)))
+
+    return runs
+
+
+MIRROR_TABLES = _mirror_tables()
+
+
+def mirror_key(key: int) -> int:
+
+    # state id of the board flipped left to right
+    raw = key.to_bytes(KEY_BYTES, "little")
+
+    return int.from_bytes(
+        b"".join(raw[start:end].translate(table) for start, end, table in MIRROR_TABLES),
+        "little"
+    )
+
+
+def canonical_key(key: int) -> int:
+    # a board and its mirror take the same number of moves to solve
+    return min(key, mirror_key(key))
 
 
 class Frontier(ABC):
@@ -122,13 +461,17 @@ class Frontier(ABC):
     def is_empty(self) -> bool:
         pass
 
+    @abstractmethod
+    def length(self) -> int:
+        pass
+
 
 class Stack(Frontier):
 
-    _items = []
+    _items: List[State]
 
-    def __init__(self, items: List[State] = []) -> None:
-        self._items = items
+    def __init__(self, items: Optional[List[State]] = None) -> None:
+        self._items = items if items is not None else []
 
     def add(self, item: State) -> None:
         self._items.append(item)
@@ -141,8 +484,11 @@ class Stack(Frontier):
     def is_empty(self) -> bool:
         return len(self._items) == 0
 
+    def length(self) -> int:
+        return len(self._items)
+
 
-@dataclass(order=True)
+@dataclass(order=True, slots=True)
 class MinHeapItem:
     priority: int
     item: State = field(compare=False)
@@ -171,30 +517,139 @@ class MinHeap(Frontier):
         return len(self._items)
 
 
-def generate_grid(puzzle_file_name: str) -> List[List[int]]:
+class BucketQueue(Frontier):
 
-    grid = []
+    # one bucket per priority, each split into one stack per cost; priorities
+    # are small integers, so add and remove are O(1) amortized
+    _buckets: List[List[List[State]]]
+    _min: int
+    _size: int
+
+    def __init__(self) -> None:
+        self._buckets = []
+        self._min = 0
+        self._size = 0
+
+    def add(self, state: State) -> None:
+
+        priority = state.get_priority()
+
+        while len(self._buckets) <= priority:
+            self._buckets.append([])
+
+        bucket = self._buckets[priority]
+        while len(bucket) <= state.cost:
+            bucket.append([])
+
+        bucket[state.cost].append(state)
+        self._size += 1
+
+        if priority < self._min:
+            self._min = priority
+
+    def remove(self) -> State:
+
+        if self._size == 0:
+            raise IndexError("remove from an empty BucketQueue")
+
+        bucket = self._buckets[self._min]
+        while not bucket:
+            self._min += 1
+            bucket = self._buckets[self._min]
+
+        # ties go to the highest cost, then to the most recently added state;
+        # stacks at the end of a bucket are never left empty
+        state = bucket[-1].pop()
+        while bucket and not bucket[-1]:
+            bucket.pop()
+
+        self._size -= 1
+        return state
+
+    def is_empty(self) -> bool:
+        return self._size == 0
+
+    def length(self) -> int:
+        return self._size
+
+
+class Beam(Frontier):
+
+    # breadth first, one layer of equal cost states at a time, keeping only
+    # the width states of each layer with the lowest heuristic; it trades
+    # completeness for bounded memory, a narrow beam may miss every solution
+    _layer: List[State]
+    _next: List[State]
+    _width: int
+
+    def __init__(self, width: int) -> None:
+        self._layer = []
+        self._next = []
+        self._width = width
+
+    def add(self, state: State) -> None:
+        self._next.append(state)
+
+    def remove(self) -> State:
+
+        if not self._layer:
+            if not self._next:
+                raise IndexError("remove from an empty Beam")
+
+            # best state last, ties keep the order they were added in
+            self._layer = heapq.nsmallest(self._width, self._next, key=_hval)
+            self._layer.reverse()
+            self._next = []
+
+        return self._layer.pop()
+
+    def is_empty(self) -> bool:
+        return not self._layer and not self._next
+
+    def length(self) -> int:
+        return len(self._layer) + len(self._next)
+
+
+def _hval(state: State) -> int:
+    return state.hval
+
+
+def generate_grid(puzzle_file_name: str) -> List[List[int]]:
 
     with open(puzzle_file_name) as puzzle_file:
-        for row in puzzle_file.readlines():
-            grid.append([int(char) for char in row.strip()])
+        return parse_grid(puzzle_file.read())
+
+
+def parse_grid(text: str) -> Grid:
+
+    # a board in the input format, one row of digits per line
+    grid = []
 
-    _load_output_symbol_map(grid)
+    for row in text.splitlines():
+        grid.append([int(char) for char in row.strip()])
 
+    _check_grid(grid)
     return grid
 
 
-def _load_output_symbol_map(grid: Grid) -> None:
+def _check_grid(grid: Grid) -> None:
 
-    pieces = generate_pieces(grid)
+    # a board that does not fit would only show up later, as a cell no piece
+    # covers in the middle of a search; State() itself takes any grid
+    if len(grid) != BOARD_ROWS or any(len(row) != BOARD_COLS for row in grid):
+        raise ValueError(f"expected {BOARD_ROWS} rows of {BOARD_COLS} digits")
 
-    for piece in pieces:
-        if piece.symbol not in output_symbol_map:
-            # horizontal piece
-            if piece.rows < piece.cols:
-                output_symbol_map[piece.symbol] = 2
-            else:
-                output_symbol_map[piece.symbol] = 3
+    covered = 0
+
+    for piece in generate_pieces(grid):
+        if covered & piece.mask():
+            raise ValueError(f"pieces overlap at row {piece.row}, col {piece.col}")
+        covered |= piece.mask()
+
+    stray = grid_occupancy(grid) & ~covered
+    if stray:
+        index = (stray & -stray).bit_length() - 1
+        raise ValueError(f"no piece covers row {index // BOARD_COLS}, col {index % BOARD_COLS}")
 
 
 def generate_pieces(grid: Grid) -> List[Piece]:
@@ -255,18 +710,18 @@ def create_two_by_two(grid: Grid, row: int, col: int) -> Optional[Piece]:
 
 def manhattan_distance(state: State) -> int:
 
-    pieces = generate_pieces(state.grid)
+    anchor = state.anchors(PieceClass.TwoByTwo)
 
-    for piece in pieces:
-        if piece.symbol == PieceType.TwoByTwo:
+    if anchor:
 
-            if is_goal_state(state):
-                return 0
+        if is_goal_state(state):
+            return 0
 
-            vert_dist = abs(3 - piece.row)
-            hori_dist = abs(1 - piece.col)
+        index = (anchor & -anchor).bit_length() - 1
+        vert_dist = abs(3 - index // BOARD_COLS)
+        hori_dist = abs(1 - index % BOARD_COLS)
 
-            return vert_dist + hori_dist
+        return vert_dist + hori_dist
 
     # max valid vertical + horizontal
     return 4
@@ -274,134 +729,1955 @@ def manhattan_distance(state: State) -> int:
 
 def advanced_heuristic(state: State) -> int:
 
-    empty_cell1: Optional[Tuple(int, int)] = None
-    empty_cell2: Optional[Tuple(int, int)] = None
+    # with two blanks the 2x2 piece leaves them right behind itself, so on a
+    # shortest path another piece moves between any two of its slides, and
+    # once more first if it cannot get any closer to the exit yet
+    distance = manhattan_distance(state)
+    anchor = state.anchors(PieceClass.TwoByTwo)
+    empty = ~state.occupied & BOARD_MASK
+
+    if distance == 0 or not anchor or bin(empty).count("1") != 2:
+        return distance
+
+    for move in MOVE_TABLE[PieceClass.TwoByTwo][anchor.bit_length() - 1]:
+        if move is not None and not move[2] & ~empty and GOAL_DISTANCES[move[0]] < distance:
+            return 2 * distance - 1
+
+    return 2 * distance
+
+
+def blocking_heuristic(state: State) -> int:
+
+    # every other piece covering a cell the 2x2 piece ends up on has to
+    # move at least once, on top of the slides of the 2x2 piece itself
+    distance = manhattan_distance(state)
+
+    if distance == 0 or not state.anchors(PieceClass.TwoByTwo):
+        return distance
+
+    for cls, blocking in GOAL_BLOCKERS.items():
+        distance += bin(state.anchors(cls) & blocking).count("1")
+
+    return distance
+
+
+class CachedHeuristic:
+
+    # remembers the values of a heuristic for the most recently evaluated
+    # boards, so each configuration only pays for it once while it stays in
+    # the cache; with symmetric set a board and its mirror share an entry
+
+    hits: int
+    misses: int
+
+    def __init__(
+        self,
+        heuristic_func: Callable[[State], int],
+        max_size: int = 100000,
+        symmetric: bool = False
+    ) -> None:
+        self._heuristic_func = heuristic_func
+        self._max_size = max_size
+        self._state_key = canonical_key if symmetric else _identity
+        self._values: 'OrderedDict[int, int]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, state: State) -> int:
+
+        key = self._state_key(state.id)
+        value = self._values.get(key)
+
+        if value is not None:
+            self.hits += 1
+            self._values.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = self._values[key] = self._heuristic_func(state)
+
+        if len(self._values) > self._max_size:
+            self._values.popitem(last=False)
+
+        return value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
 
-    for row in state.grid:
-        for col in row:
-            if col == PieceType.EMPTY:
-                if empty_cell1 == None:
-                    empty_cell1 = (row, col)
-                else:
-                    empty_cell2 = (row, col)
+def max_heuristic(*heuristic_funcs: Callable[[State], int]) -> Callable[[State], int]:
 
-    pieces = generate_pieces(state.grid)
-    caocao: Piece
+    def heuristic(state: State) -> int:
+        return max(heuristic_func(state) for heuristic_func in heuristic_funcs)
 
-    for p in pieces:
-        if p.symbol == PieceType.TwoByTwo:
-            caocao = p
+    return heuristic
 
-    caocao_bot_left = (caocao.row + 1, caocao.col)
 
-    rec_height = 5 - caocao_bot_left[0]
-    rec_width = min(abs(empty_cell1[1] - caocao.col + 1), abs(empty_cell2[1] - caocao.col + 1), 2)
+# top-left cell of a 2x2 piece sitting above the exit
+GOAL_ANCHOR = 1 << (3 * BOARD_COLS + 1)
+GOAL_ROW, GOAL_COL = divmod(GOAL_ANCHOR.bit_length() - 1, BOARD_COLS)
 
-    perimeter_tiles = (2 * rec_height) + (2 * (rec_width - 2))
-    man_dist = abs(4 - caocao_bot_left[0]) + abs(1 - caocao.col)
+# cells covered by a 2x2 piece sitting above the exit
+GOAL_BLOCK = cell_mask(2, 2, GOAL_ROW, GOAL_COL)
 
-    return man_dist * perimeter_tiles
+# slides a 2x2 piece with its top-left cell at each index is from the exit
+GOAL_DISTANCES = [
+    abs(GOAL_ROW - index // BOARD_COLS) + abs(GOAL_COL - index % BOARD_COLS)
+    for index in range(BOARD_CELLS)
+]
+
+
+def _goal_blockers(cls: int) -> int:
+
+    # top-left cells of the pieces of a class that overlap GOAL_BLOCK
+    anchors = 0
+    rows, cols = CLASS_SHAPES[cls]
+
+    for row in range(BOARD_ROWS - rows + 1):
+        for col in range(BOARD_COLS - cols + 1):
+            if cell_mask(rows, cols, row, col) & GOAL_BLOCK:
+                anchors |= 1 << (row * BOARD_COLS + col)
+
+    return anchors
+
+
+GOAL_BLOCKERS = {cls: _goal_blockers(cls) for cls in PIECE_CLASSES if cls != PieceClass.TwoByTwo}
 
 
 def is_goal_state(state: State) -> bool:
-    for row, col in [(3, 1), (3, 1), (4, 2), (4, 2)]:
-        if state.grid[row][col] != PieceType.TwoByTwo:
-            return False
+    return is_goal_key(state.id)
+
+
+def is_goal_key(key: int) -> bool:
+    return key >> CLASS_SHIFTS[PieceClass.TwoByTwo] & GOAL_ANCHOR != 0
+
+
+@dataclass
+class SearchStats:
+    # states popped from the frontier and expanded
+    expanded: int = 0
+    # successors of the expanded states
+    generated: int = 0
+    # successors not added because the state was already explored or already
+    # waiting in the frontier at an equal or lower cost
+    duplicates_avoided: int = 0
+    # popped states that had already been explored
+    duplicate_pops: int = 0
+    # most states held by the frontier and the explored set at once
+    peak_frontier: int = 0
+    peak_explored: int = 0
+    # wall time of the search and, with timed set, of its parts
+    seconds: float = 0.0
+    timed: bool = False
+    successor_seconds: float = 0.0
+    heuristic_seconds: float = 0.0
+    frontier_seconds: float = 0.0
+    # progress is called with these stats every progress_every expansions
+    progress_every: int = 0
+    progress: Optional[Callable[['SearchStats'], None]] = field(default=None, repr=False)
+
+    def nodes_per_second(self) -> float:
+        return self.expanded / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+
+        summary = {
+            name: getattr(self, name)
+            for name in [
+                "expanded", "generated", "duplicates_avoided", "duplicate_pops",
+                "peak_frontier", "peak_explored", "seconds"
+            ]
+        }
+        summary["nodes_per_second"] = self.nodes_per_second()
+
+        if self.timed:
+            summary["successor_seconds"] = self.successor_seconds
+            summary["heuristic_seconds"] = self.heuristic_seconds
+            summary["frontier_seconds"] = self.frontier_seconds
+
+        return summary
+
+    def format_progress(self) -> str:
+        return (
+            f"expanded {self.expanded}  generated {self.generated}  "
+            f"frontier {self.peak_frontier}  explored {self.peak_explored}  "
+            f"{self.seconds:.1f}s  {self.nodes_per_second():.0f} nodes/s"
+        )
 
-    return True
 
+@dataclass
+class SearchBudget:
+    # limits of a single search, None for no limit
+    seconds: Optional[float] = None
+    expansions: Optional[int] = None
+    explored: Optional[int] = None
 
-def search(
-    start: State,
-    frontier: Frontier,
-    heuristic_func: Callable[[State], int]
-) -> Optional[State]:
 
-    start.cost = 0
-    start.hval = heuristic_func(start)
+class BudgetExceeded(Exception):
 
-    frontier.add(start)
-    explored: Dict[str, State] = {}
+    # raised by search when a limit of its budget is hit, with the work done
+    # up to that point
 
-    while not frontier.is_empty():
+    def __init__(self, reason: str, stats: SearchStats) -> None:
+        super().__init__(f"search budget exceeded: {reason}")
+        self.reason = reason
+        self.stats = stats
 
-        curr_state = frontier.remove()
+    def to_dict(self) -> Dict[str, Any]:
+        return {"budget_exceeded": self.reason, "stats": self.stats.to_dict()}
 
-        if curr_state.id not in explored:
 
-            explored[curr_state.id] = curr_state
+def print_progress(stats: SearchStats) -> None:
+    print(stats.format_progress(), file=sys.stderr)
 
-            if is_goal_state(curr_state):
-                return curr_state
 
-            for neighbour in curr_state.get_successors():
-                neighbour.cost = curr_state.cost + 1
-                neighbour.hval = heuristic_func(neighbour)
-                frontier.add(neighbour)
+class _TimedFrontier(Frontier):
 
-    return None
+    # adds the time spent in add and remove to stats.frontier_seconds
 
+    def __init__(self, frontier: Frontier, stats: SearchStats) -> None:
+        self._frontier = frontier
+        self._stats = stats
 
-def recreate_start_to_goal_path(goal: State) -> Tuple[int, List[State]]:
+    def add(self, state: State) -> None:
+        started = time.perf_counter()
+        self._frontier.add(state)
+        self._stats.frontier_seconds += time.perf_counter() - started
 
-    curr_state = goal
-    stack = Stack([])
-    path = []
+    def remove(self) -> State:
+        started = time.perf_counter()
+        state = self._frontier.remove()
+        self._stats.frontier_seconds += time.perf_counter() - started
+        return state
 
-    while curr_state is not None:
-        stack.add(curr_state)
-        curr_state = curr_state.parent
+    def is_empty(self) -> bool:
+        return self._frontier.is_empty()
 
-    while not stack.is_empty():
-        path.append(stack.remove())
+    def length(self) -> int:
+        return self._frontier.length()
 
-    return len(path) - 1, path
 
+def _timed(func: Callable, stats: SearchStats, attribute: str) -> Callable:
 
-def write_path(filename: str, cost: int, path: List[State]) -> None:
+    # func, adding the time spent in it to one of the stats' seconds
+    def timed(*args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            setattr(stats, attribute, getattr(stats, attribute) + time.perf_counter() - started)
 
-    with open(filename, mode='w') as f:
-        f.write(f"Cost of the solution: {cost}\n")
+    return timed
 
-        for state in path:
-            grid_str = ""
-            for row in state.grid:
-                row_str = ""
-                for col in row:
-                    row_str += str(output_symbol_map[col])
-                grid_str += row_str + "\n"
-            f.write(grid_str + "\n")
 
+def search(
+    start: State,
+    frontier: Frontier,
+    heuristic_func: Callable[[State], int],
+    multi_step: bool = False,
+    compact: bool = False,
+    detect_duplicates: bool = False,
+    stats: Optional[SearchStats] = None,
+    symmetric: bool = False,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+
+    if stats is None and budget is None:
+        return _search(
+            start, frontier, heuristic_func, State.get_successors,
+            multi_step, compact, detect_duplicates, None, symmetric
+        )
 
-def main(input_filename: str, dfs_filename: str, a_star_filename: str) -> None:
+    stats, started = _start_stats(stats, budget)
 
-    start_state = State(generate_grid(input_filename))
-    dfs_goal = search(start_state, Stack(), lambda s: 0)
+    # counters cost next to nothing, timing every part is only done on request
+    get_successors = State.get_successors
 
-    if dfs_goal is None:
-        print("DFS could not find a solution")
-    else:
-        dfs_cost, dfs_sol_path = recreate_start_to_goal_path(dfs_goal)
-        write_path(dfs_filename, dfs_cost, dfs_sol_path)
+    if stats.timed:
+        frontier = _TimedFrontier(frontier, stats)
+        heuristic_func = _timed(heuristic_func, stats, "heuristic_seconds")
+        get_successors = _timed(get_successors, stats, "successor_seconds")
 
-    start_state = State(generate_grid(input_filename))
-    a_star_goal = search(start_state, MinHeap(), manhattan_distance)
+    try:
+        return _search(
+            start, frontier, heuristic_func, get_successors,
+            multi_step, compact, detect_duplicates, stats, symmetric, started, budget
+        )
+    finally:
+        stats.seconds = time.perf_counter() - started
 
-    if a_star_goal is None:
-        print("A* could not find a solution")
-    else:
-        a_star_cost, a_star_sol_path = recreate_start_to_goal_path(a_star_goal)
-        write_path(a_star_filename, a_star_cost, a_star_sol_path)
 
+def _search(
+    start: State,
+    frontier: Frontier,
+    heuristic_func: Callable[[State], int],
+    get_successors: Callable[[State, bool], List[State]],
+    multi_step: bool,
+    compact: bool,
+    detect_duplicates: bool,
+    stats: Optional[SearchStats],
+    symmetric: bool,
+    started: float = 0.0,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
 
-if __name__ == "__main__":
+    start.cost = 0
+    start.hval = heuristic_func(start)
 
-    if len(argv) != 4:
-        print("Usage: python3 hrd.py  <input file>  <DFS output file>  <A* output file>")
-        exit()
+    # with symmetric set, a board and its left to right mirror share one
+    # entry; states are never replaced by their mirror, so every path found
+    # is made of real moves from the start
+    state_key = canonical_key if symmetric else _identity
+
+    frontier.add(start)
+    # with compact set, only the move that reached each state is kept and
+    # frontier states drop their parent, the path is replayed at the end
+    explored: Dict[int, Union[State, int]] = {}
+    # lowest cost of every state waiting in the frontier, a cheaper path adds
+    # the state again and the stale entry is skipped once popped
+    opened: Dict[int, int] = {state_key(start.id): 0}
+
+    while not frontier.is_empty():
+
+        curr_state = frontier.remove()
+        curr_key = state_key(curr_state.id)
+
+        if curr_key in explored:
+            if stats is not None:
+                stats.duplicate_pops += 1
+            continue
+
+        opened.pop(curr_key, None)
+
+        if not compact:
+            explored[curr_key] = curr_state
+        elif curr_state is start:
+            explored[curr_key] = -1
+        else:
+            explored[curr_key] = _move_id(curr_state)
+
+        if is_goal_state(curr_state):
+            if compact:
+                keys = _explored_path(curr_state.id, explored, state_key)
+                return replay_path(start, keys, multi_step)
+            return curr_state
+
+        successors = get_successors(curr_state, multi_step)
+        cost = curr_state.cost + 1
+
+        for neighbour in successors:
+
+            if detect_duplicates:
+                key = state_key(neighbour.id)
+                if key in explored or opened.get(key, cost + 1) <= cost:
+                    if stats is not None:
+                        stats.duplicates_avoided += 1
+                    continue
+                opened[key] = cost
+
+            if compact:
+                neighbour.parent = None
+            neighbour.cost = cost
+            neighbour.hval = heuristic_func(neighbour)
+            frontier.add(neighbour)
+
+        if stats is not None:
+            _count_expansions(
+                stats, 1, len(successors), frontier.length(), len(explored), started, budget
+            )
+
+    return None
+
+
+def _start_stats(
+    stats: Optional[SearchStats], budget: Optional[SearchBudget]
+) -> Tuple[Optional[SearchStats], float]:
+
+    # a budget needs the counters, and the partial stats go with
+    # BudgetExceeded; the start time carries on from earlier searches
+    if stats is None and budget is not None:
+        stats = SearchStats()
+
+    return stats, time.perf_counter() - (stats.seconds if stats is not None else 0.0)
+
+
+def _count_expansions(
+    stats: SearchStats,
+    expanded: int,
+    generated: int,
+    frontier_size: int,
+    explored_size: int,
+    started: float,
+    budget: Optional[SearchBudget]
+) -> None:
+
+    # after every expansion, or every round of them, of any search
+    before = stats.expanded
+    stats.expanded += expanded
+    stats.generated += generated
+    stats.peak_frontier = max(stats.peak_frontier, frontier_size)
+    stats.peak_explored = max(stats.peak_explored, explored_size)
+
+    every = stats.progress_every
+    if every and stats.expanded // every > before // every:
+        stats.seconds = time.perf_counter() - started
+        (stats.progress or print_progress)(stats)
+
+    if budget is not None:
+        _check_budget(budget, stats, started)
+
+
+def _check_budget(budget: SearchBudget, stats: SearchStats, started: float) -> None:
+
+    if budget.expansions is not None and stats.expanded >= budget.expansions:
+        raise BudgetExceeded(f"expanded {stats.expanded} states", stats)
+
+    if budget.explored is not None and stats.peak_explored >= budget.explored:
+        raise BudgetExceeded(f"explored {stats.peak_explored} states", stats)
+
+    if budget.seconds is not None and time.perf_counter() - started >= budget.seconds:
+        raise BudgetExceeded(f"ran for {budget.seconds}s", stats)
+
+
+def _identity(key: int) -> int:
+    return key
+
+
+def _move_id(state: State) -> int:
+
+    # old * BOARD_CELLS + new top-left index of the piece moved into this state
+    old_index, index = state._moved
+    return old_index * BOARD_CELLS + index
+
+
+def _explored_path(
+    key: int, explored: Dict[int, int], state_key: Callable[[int], int] = _identity
+) -> List[int]:
+
+    # state ids from the start to key, undoing the recorded moves; every
+    # state on the path was expanded itself, so the entry under its
+    # canonical key is its own even when its mirror was reached too
+    keys = [key]
+    move = explored[state_key(key)]
+
+    while move >= 0:
+        old_index, index = divmod(move, BOARD_CELLS)
+        for cls in PIECE_CLASSES:
+            if key >> CLASS_SHIFTS[cls] >> index & 1:
+                key ^= (1 << old_index | 1 << index) << CLASS_SHIFTS[cls]
+                break
+
+        keys.append(key)
+        move = explored[state_key(key)]
+
+    keys.reverse()
+    return keys
+
+
+def generate_goal_states(
+    start: State, classes: Collection[int] = PIECE_CLASSES
+) -> List[State]:
+
+    # every placement of the start's pieces with a 2x2 piece above the exit;
+    # with only some classes the other pieces are left off the board, and
+    # the cells above the exit stay free when the 2x2 piece is one of them
+    counts = {
+        cls: bin(start.anchors(cls)).count("1") if cls in classes else 0 for cls in PIECE_CLASSES
+    }
+
+    key = 0
+    occupied = 0
+
+    if PieceClass.TwoByTwo in classes:
+        counts[PieceClass.TwoByTwo] -= 1
+        key = GOAL_ANCHOR << CLASS_SHIFTS[PieceClass.TwoByTwo]
+        occupied = GOAL_BLOCK
+
+    covered = sum(counts[cls] * rows * cols for cls, (rows, cols) in CLASS_SHAPES.items())
+    blanks = BOARD_CELLS - 4 - covered
+
+    goals = []
+    if counts[PieceClass.TwoByTwo] >= 0 and blanks >= 0:
+        _place_pieces(0, key, occupied, GOAL_BLOCK, counts, blanks, goals)
+
+    return goals
+
+
+def _place_pieces(
+    index: int,
+    key: int,
+    occupied: int,
+    filled: int,
+    counts: Dict[int, int],
+    blanks: int,
+    goals: List[State]
+) -> None:
+
+    # fill the first undecided cell with a blank or the top-left of a piece
+    while index < BOARD_CELLS and filled >> index & 1:
+        index += 1
+
+    if index == BOARD_CELLS:
+        goals.append(State(key=key, occupied=occupied))
+        return
+
+    if blanks > 0:
+        _place_pieces(index + 1, key, occupied, filled | 1 << index, counts, blanks - 1, goals)
+
+    row, col = index // BOARD_COLS, index % BOARD_COLS
+
+    for cls in PIECE_CLASSES:
+        rows, cols = CLASS_SHAPES[cls]
+        if counts[cls] == 0 or row + rows > BOARD_ROWS or col + cols > BOARD_COLS:
+            continue
+
+        mask = cell_mask(rows, cols, row, col)
+        if mask & filled:
+            continue
+
+        counts[cls] -= 1
+        _place_pieces(
+            index + 1,
+            key | 1 << index << CLASS_SHIFTS[cls],
+            occupied | mask,
+            filled | mask,
+            counts,
+            blanks,
+            goals
+        )
+        counts[cls] += 1
+
+
+def bidirectional_search(
+    start: State,
+    multi_step: bool = False,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+
+    # breadth first from the start and from every goal placement at once,
+    # always growing the side with the smaller frontier by one full layer
+    start.cost = 0
+
+    if is_goal_state(start):
+        return start
+
+    goals = generate_goal_states(start)
+    forward: Dict[int, State] = {start.id: start}
+    backward: Dict[int, State] = {goal.id: goal for goal in goals}
+
+    forward_layer = [start]
+    backward_layer = goals
+
+    # only search() and anytime_search() time their parts, the part timers
+    # stay at zero here
+    stats, started = _start_stats(stats, budget)
+
+    try:
+        while forward_layer and backward_layer:
+
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = _expand_layer(
+                    forward_layer, forward, backward, multi_step, stats, started, budget
+                )
+                if meeting:
+                    return _join_paths(meeting, backward[meeting.id])
+            else:
+                backward_layer, meeting = _expand_layer(
+                    backward_layer, backward, forward, multi_step, stats, started, budget
+                )
+                if meeting:
+                    return _join_paths(forward[meeting.id], meeting)
+    finally:
+        if stats is not None:
+            stats.seconds = time.perf_counter() - started
+
+    return None
+
+
+def _expand_layer(
+    layer: List[State],
+    explored: Dict[int, State],
+    other: Dict[int, State],
+    multi_step: bool,
+    stats: Optional[SearchStats] = None,
+    started: float = 0.0,
+    budget: Optional[SearchBudget] = None
+) -> Tuple[List[State], Optional[State]]:
+
+    next_layer = []
+    meeting: Optional[State] = None
+
+    for position, state in enumerate(layer):
+        successors = state.get_successors(multi_step)
+
+        if stats is not None:
+            _count_expansions(
+                stats,
+                1,
+                len(successors),
+                len(layer) - position + len(next_layer),
+                len(explored) + len(other),
+                started,
+                budget
+            )
+
+        for neighbour in successors:
+
+            if neighbour.id in explored:
+                continue
+
+            neighbour.cost = state.cost + 1
+            explored[neighbour.id] = neighbour
+            next_layer.append(neighbour)
+
+            # the whole layer is finished so the shortest meeting wins
+            if neighbour.id in other and (
+                meeting is None or other[neighbour.id].cost < other[meeting.id].cost
+            ):
+                meeting = neighbour
+
+    return next_layer, meeting
+
+
+def _join_paths(forward: State, backward: State) -> State:
+
+    # replay the goal side of the path on top of the start side
+    curr_state = forward
+
+    while backward.parent is not None:
+        old_index, index = backward._moved
+        backward = backward.parent
+
+        curr_state = State(
+            parent=curr_state,
+            key=backward.id,
+            occupied=backward.occupied,
+            moved=(index, old_index)
+        )
+        curr_state.cost = curr_state.parent.cost + 1
+
+    return curr_state
+
+
+def build_distance_database(
+    start: State, multi_step: bool = False, classes: Collection[int] = PIECE_CLASSES
+) -> Dict[int, int]:
+
+    # retrograde breadth first search from every goal placement, giving the
+    # exact number of moves left for every state that can reach a goal
+    distances: Dict[int, int] = {}
+    layer = []
+
+    for goal in generate_goal_states(start, classes):
+        distances[goal.id] = 0
+        layer.append((goal.id, goal.occupied))
+
+    distance = 0
+
+    while layer:
+        distance += 1
+        next_layer = []
+
+        for key, occupied in layer:
+            for neighbour, neighbour_occupied, _, _ in get_neighbours(key, occupied, multi_step):
+                if neighbour not in distances:
+                    distances[neighbour] = distance
+                    next_layer.append((neighbour, neighbour_occupied))
+
+        layer = next_layer
+
+    return distances
+
+
+# a header followed by fixed size (state id, distance) records sorted by id,
+# ids are stored big endian so comparing record bytes compares the ids
+DATABASE_MAGIC = b"HRDDIST\x01"
+DATABASE_HEADER = struct.Struct(">8s?7xQ")
+DATABASE_RECORD = struct.Struct(f">{KEY_BYTES}sH")
+
+
+def write_distance_database(
+    filename: str, distances: Dict[int, int], multi_step: bool = False
+) -> None:
+
+    records = bytearray(DATABASE_HEADER.pack(DATABASE_MAGIC, multi_step, len(distances)))
+
+    for key in sorted(distances):
+        records += DATABASE_RECORD.pack(key.to_bytes(KEY_BYTES, "big"), distances[key])
+
+    with open(filename, mode='wb') as f:
+        f.write(records)
+
+
+class DistanceDatabase:
+
+    # read only view of a file written by write_distance_database, mapped into
+    # memory so every process that opens it shares the same pages
+
+    multi_step: bool
+    _length: int
+
+    def __init__(self, filename: str) -> None:
+
+        with open(filename, mode='rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._map[:len(DATABASE_MAGIC)]
+        if magic == DATABASE_MAGIC:
+            _, self.multi_step, self._length = DATABASE_HEADER.unpack_from(self._map)
+
+        if magic != DATABASE_MAGIC or len(self._map) != (
+            DATABASE_HEADER.size + self._length * DATABASE_RECORD.size
+        ):
+            self._map.close()
+            raise ValueError(f"{filename} is not a distance database")
+
+    def get(self, key: int, default: Optional[int] = None) -> Optional[int]:
+
+        if key < 0 or key.bit_length() > KEY_BYTES * 8:
+            return default
+
+        target = key.to_bytes(KEY_BYTES, "big")
+        low, high = 0, self._length
+
+        # binary search straight over the mapped records
+        while low < high:
+            mid = (low + high) // 2
+            offset = DATABASE_HEADER.size + mid * DATABASE_RECORD.size
+            record_key = self._map[offset:offset + KEY_BYTES]
+
+            if record_key < target:
+                low = mid + 1
+            elif record_key > target:
+                high = mid
+            else:
+                return DATABASE_RECORD.unpack_from(self._map, offset)[1]
+
+        return default
+
+    def __getitem__(self, key: int) -> int:
+        distance = self.get(key)
+        if distance is None:
+            raise KeyError(key)
+        return distance
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> 'DistanceDatabase':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def database_heuristic(distances: Mapping[int, int]) -> Callable[[State], int]:
+
+    # exact distance to goal, 0 for states the database does not know about
+    def heuristic(state: State) -> int:
+        return distances.get(state.id, 0)
+
+    return heuristic
+
+
+# the 2x2 piece and the 1x2 pieces in one pattern, the 1x1 pieces in another
+DEFAULT_PATTERNS = [
+    (PieceClass.TwoByTwo, PieceClass.Horizontal, PieceClass.Vertical),
+    (PieceClass.OneByOne,)
+]
+
+
+def pattern_database_heuristic(
+    start: State,
+    multi_step: bool = False,
+    patterns: List[Collection[int]] = DEFAULT_PATTERNS
+) -> Callable[[State], int]:
+
+    # one distance database per disjoint set of classes, built with only
+    # those pieces on the board; a move slides a single piece, so the number
+    # of moves each pattern needs on its own add up to a lower bound
+    databases = []
+
+    for classes in patterns:
+        mask = 0
+        for cls in classes:
+            mask |= BOARD_MASK << CLASS_SHIFTS[cls]
+
+        databases.append((build_distance_database(start, multi_step, classes), mask))
+
+    def heuristic(state: State) -> int:
+        return sum(distances.get(state.id & mask, 0) for distances, mask in databases)
+
+    return heuristic
+
+
+def strongest_heuristic(start: State, multi_step: bool = False) -> Callable[[State], int]:
+    return max_heuristic(
+        advanced_heuristic, blocking_heuristic, pattern_database_heuristic(start, multi_step)
+    )
+
+
+DEFAULT_HEURISTIC = "manhattan"
+
+# admissible heuristics by name, each built for a start board and move rule
+HEURISTICS: Dict[str, Callable[[State, bool], Callable[[State], int]]] = {
+    "manhattan": lambda start, multi_step: manhattan_distance,
+    "advanced": lambda start, multi_step: advanced_heuristic,
+    "blocking": lambda start, multi_step: blocking_heuristic,
+    "pattern": pattern_database_heuristic,
+    "max": strongest_heuristic
+}
+
+
+def database_search(
+    start: State, distances: Mapping[int, int], multi_step: bool = False
+) -> Optional[State]:
+
+    # walk downhill through the distances, one lookup per successor
+    if start.id not in distances:
+        return None
+
+    start.cost = 0
+    curr_state = start
+
+    while distances[curr_state.id] > 0:
+        distance = distances[curr_state.id]
+        next_state = None
+
+        for neighbour in curr_state.get_successors(multi_step):
+            if distances.get(neighbour.id) == distance - 1:
+                next_state = neighbour
+                break
+
+        # built for other pieces or another move rule
+        if next_state is None:
+            return None
+
+        next_state.cost = curr_state.cost + 1
+        curr_state = next_state
+
+    return curr_state
+
+
+# states kept by a SolutionCache before the least recently used solutions go
+SOLUTION_CACHE_STATES = 100000
+
+SOLUTION_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    id INTEGER PRIMARY KEY,
+    algorithm TEXT NOT NULL,
+    multi_step INTEGER NOT NULL,
+    path BLOB NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used);
+CREATE TABLE IF NOT EXISTS positions (
+    key BLOB NOT NULL,
+    algorithm TEXT NOT NULL,
+    multi_step INTEGER NOT NULL,
+    solution INTEGER NOT NULL,
+    distance INTEGER NOT NULL,
+    PRIMARY KEY (key, algorithm, multi_step)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS positions_solution ON positions (solution);
+"""
+
+
+class SolutionCache:
+
+    # solutions kept in an sqlite file, shared by runs and processes. A path
+    # is stored as its state ids, KEY_BYTES each, and every state on it is
+    # indexed by canonical key with the moves left from there, so any board
+    # along a cached path or its mirror image is answered by the rest of it
+
+    max_states: int
+
+    def __init__(self, filename: str, max_states: int = SOLUTION_CACHE_STATES) -> None:
+
+        self.max_states = max_states
+        self._connection = sqlite3.connect(filename, timeout=60)
+
+        try:
+            self._connection.executescript(SOLUTION_CACHE_SCHEMA)
+        except sqlite3.DatabaseError as e:
+            self._connection.close()
+            raise ValueError(f"{filename} is not a solution cache") from e
+
+    def get(self, start: State, algorithm: str, multi_step: bool = False) -> Optional[State]:
+
+        key = canonical_key(start.id).to_bytes(KEY_BYTES, "big")
+
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT solutions.id, path, distance FROM positions"
+                " JOIN solutions ON solutions.id = positions.solution"
+                " WHERE key = ? AND positions.algorithm = ? AND positions.multi_step = ?",
+                (key, algorithm, multi_step)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            solution, path, distance = row
+            self._connection.execute(
+                "UPDATE solutions SET used = ? WHERE id = ?", (self._next_use(), solution)
+            )
+
+        suffix = path[len(path) - (distance + 1) * KEY_BYTES:]
+        keys = [
+            int.from_bytes(suffix[i:i + KEY_BYTES], "big")
+            for i in range(0, len(suffix), KEY_BYTES)
+        ]
+
+        # the cached path runs through the mirror image of this board
+        if keys[0] != start.id:
+            keys = [mirror_key(key) for key in keys]
+
+        return replay_path(start, keys, multi_step)
+
+    def put(self, goal: State, algorithm: str, multi_step: bool = False) -> None:
+
+        cost, path = recreate_start_to_goal_path(goal)
+
+        with self._connection:
+            solution = self._connection.execute(
+                "INSERT INTO solutions (algorithm, multi_step, path, used) VALUES (?, ?, ?, ?)",
+                (
+                    algorithm,
+                    multi_step,
+                    b"".join(state.id.to_bytes(KEY_BYTES, "big") for state in path),
+                    self._next_use()
+                )
+            ).lastrowid
+
+            # a board already on another path keeps the shorter of the two
+            self._connection.executemany(
+                "INSERT INTO positions VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT DO UPDATE SET solution = excluded.solution,"
+                " distance = excluded.distance WHERE excluded.distance < distance",
+                [
+                    (
+                        canonical_key(state.id).to_bytes(KEY_BYTES, "big"),
+                        algorithm,
+                        multi_step,
+                        solution,
+                        cost - step
+                    )
+                    for step, state in enumerate(path)
+                ]
+            )
+
+            self._evict()
+
+    def _next_use(self) -> int:
+        return self._connection.execute(
+            "SELECT COALESCE(MAX(used), 0) + 1 FROM solutions"
+        ).fetchone()[0]
+
+    def _evict(self) -> None:
+
+        # least recently used solutions first, until the paths fit max_states
+        size = self._connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(path)), 0) FROM solutions"
+        ).fetchone()[0]
+
+        for solution, length in self._connection.execute(
+            "SELECT id, LENGTH(path) FROM solutions ORDER BY used"
+        ).fetchall():
+            if size <= self.max_states * KEY_BYTES:
+                break
+
+            self._connection.execute("DELETE FROM positions WHERE solution = ?", (solution,))
+            self._connection.execute("DELETE FROM solutions WHERE id = ?", (solution,))
+            size -= length
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'SolutionCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def parallel_search(
+    start: State,
+    heuristic: str = DEFAULT_HEURISTIC,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+    multi_step: bool = False,
+    start_method: Optional[str] = None,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+
+    # hash distributed A*: every state id belongs to one worker process, which
+    # keeps its own open list and g values; workers expand in rounds and send
+    # each other the successors they own in one batch per round. Heuristics
+    # may be closures, which spawned workers cannot unpickle, so each worker
+    # builds its own from the name
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context(start_method)
+
+    controls = [context.Queue() for _ in range(workers)]
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+
+    processes = [
+        context.Process(
+            target=_hda_worker,
+            args=(
+                index, workers, start.id, start.occupied, heuristic, multi_step,
+                batch_size, controls[index], inboxes, results
+            ),
+            daemon=True
+        )
+        for index in range(workers)
+    ]
+
+    for process in processes:
+        process.start()
+
+    incumbent: Optional[int] = None
+    goal_key: Optional[int] = None
+    finished = False
+
+    # only search() and anytime_search() time their parts, the part timers
+    # stay at zero here
+    stats, started = _start_stats(stats, budget)
+
+    try:
+        while True:
+            for control in controls:
+                control.put(("round", incumbent))
+
+            min_priorities = []
+            # expanded, generated, open and explored states of every worker
+            counts = [0, 0, 0, 0]
+
+            for _ in range(workers):
+                goal, min_priority, worker_counts = _receive(results, processes)
+                if goal is not None and (incumbent is None or goal[0] < incumbent):
+                    incumbent, goal_key = goal
+                if min_priority is not None:
+                    min_priorities.append(min_priority)
+                counts = [total + count for total, count in zip(counts, worker_counts)]
+
+            if stats is not None:
+                _count_expansions(stats, *counts, started, budget)
+
+            # every batch has been delivered by the end of a round, so the
+            # open lists hold every state that could still lead to a goal
+            if incumbent is not None and all(f >= incumbent for f in min_priorities):
+                break
+            if incumbent is None and not min_priorities:
+                break
+
+        for control in controls:
+            control.put(("finish", None))
+
+        parents: Dict[int, Optional[int]] = {}
+        for _ in range(workers):
+            parents.update(_receive(results, processes))
+        finished = True
+
+    finally:
+        # workers only exit on their own once told to finish
+        for process in processes:
+            if finished:
+                process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+        if stats is not None:
+            stats.seconds = time.perf_counter() - started
+
+    if goal_key is None:
+        return None
+
+    keys = [goal_key]
+    while parents[keys[-1]] is not None:
+        keys.append(parents[keys[-1]])
+
+    return replay_path(start, keys[::-1], multi_step)
+
+
+def _receive(results: multiprocessing.Queue, processes: List[multiprocessing.Process]) -> Any:
+
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not all(process.is_alive() for process in processes):
+                raise RuntimeError("a search worker exited unexpectedly")
+
+
+def _hda_worker(
+    index: int,
+    workers: int,
+    start_key: int,
+    start_occupied: int,
+    heuristic: str,
+    multi_step: bool,
+    batch_size: int,
+    control: multiprocessing.Queue,
+    inboxes: List[multiprocessing.Queue],
+    results: multiprocessing.Queue
+) -> None:
+
+    heuristic_func = HEURISTICS[heuristic](State(key=start_key, occupied=start_occupied), multi_step)
+
+    # (f, -g, g, key, occupied); deeper states first among equal f
+    open_list: List[Tuple[int, int, int, int, int]] = []
+    best_g: Dict[int, int] = {}
+    parents: Dict[int, Optional[int]] = {}
+
+    def add(key: int, occupied: int, g: int, parent: Optional[int]) -> None:
+        if key in best_g and best_g[key] <= g:
+            return
+        best_g[key] = g
+        parents[key] = parent
+        f = g + heuristic_func(State(key=key, occupied=occupied))
+        heapq.heappush(open_list, (f, -g, g, key, occupied))
+
+    if hash(start_key) % workers == index:
+        add(start_key, start_occupied, 0, None)
+
+    while True:
+        command, incumbent = control.get()
+
+        if command == "finish":
+            results.put(parents)
+            return
+
+        outgoing: List[List[Tuple[int, int, int, int]]] = [[] for _ in range(workers)]
+        goal: Optional[Tuple[int, int]] = None
+        expanded = 0
+        generated = 0
+
+        while open_list and expanded < batch_size:
+            f, _, g, key, occupied = open_list[0]
+            if incumbent is not None and f >= incumbent:
+                break
+
+            heapq.heappop(open_list)
+            if g > best_g[key]:
+                continue
+
+            if is_goal_key(key):
+                if goal is None or g < goal[0]:
+                    goal = (g, key)
+                continue
+
+            expanded += 1
+            successors = get_neighbours(key, occupied, multi_step)
+            generated += len(successors)
+            for neighbour, neighbour_occupied, _, _ in successors:
+                outgoing[hash(neighbour) % workers].append(
+                    (neighbour, neighbour_occupied, g + 1, key)
+                )
+
+        for destination in range(workers):
+            if destination != index:
+                inboxes[destination].put(outgoing[destination])
+
+        # exactly one batch from every other worker per round
+        batches = [outgoing[index]]
+        for _ in range(workers - 1):
+            batches.append(inboxes[index].get())
+
+        for batch in batches:
+            for key, occupied, g, parent in batch:
+                add(key, occupied, g, parent)
+
+        results.put((
+            goal,
+            open_list[0][0] if open_list else None,
+            (expanded, generated, len(open_list), len(best_g))
+        ))
+
+
+def ida_star_search(
+    start: State,
+    heuristic_func: Callable[[State], int],
+    multi_step: bool = False,
+    table_size: int = 0,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+
+    # depth first searches bounded by f = g + h, raising the bound to the
+    # smallest f that went over it, so memory only grows with the path and
+    # the optional transposition table
+    table: 'OrderedDict[int, List[int]]' = OrderedDict()
+    bound = heuristic_func(start)
+    iteration = 0
+
+    # only search() and anytime_search() time their parts, the part timers
+    # stay at zero here
+    stats, started = _start_stats(stats, budget)
+
+    try:
+        while True:
+            iteration += 1
+            keys, bound = _bounded_search(
+                start, heuristic_func, bound, iteration, table, table_size, multi_step,
+                stats, started, budget
+            )
+
+            if keys is not None:
+                return replay_path(start, keys, multi_step)
+            if bound is None:
+                return None
+    finally:
+        if stats is not None:
+            stats.seconds = time.perf_counter() - started
+
+
+def _bounded_search(
+    start: State,
+    heuristic_func: Callable[[State], int],
+    bound: int,
+    iteration: int,
+    table: 'OrderedDict[int, List[int]]',
+    table_size: int,
+    multi_step: bool,
+    stats: Optional[SearchStats] = None,
+    started: float = 0.0,
+    budget: Optional[SearchBudget] = None
+) -> Tuple[Optional[List[int]], Optional[int]]:
+
+    # table entries are [iteration, smallest g reached with in it, h], the
+    # least recently used entries are evicted once it holds table_size states
+    if is_goal_state(start):
+        return [start.id], None
+
+    path = [start.id]
+    on_path = {start.id}
+    successors = get_neighbours(start.id, start.occupied, multi_step)
+    # [successors left to try, smallest f found below this state]
+    frames = [[iter(successors), None]]
+    next_bound: Optional[int] = None
+
+    if stats is not None:
+        _count_expansions(stats, 1, len(successors), len(frames), len(table), started, budget)
+
+    while frames:
+
+        frame = frames[-1]
+        neighbour = next(frame[0], None)
+
+        if neighbour is None:
+            frames.pop()
+            key = path.pop()
+            on_path.discard(key)
+            below = frame[1]
+
+            if below is not None:
+                # everything under this state costs at least below, which
+                # is a better heuristic for the next iterations
+                if key in table:
+                    table[key][2] = max(table[key][2], below - len(path))
+                if frames and (frames[-1][1] is None or below < frames[-1][1]):
+                    frames[-1][1] = below
+            continue
+
+        key, occupied, _, _ = neighbour
+        g = len(path)
+        entry = table.get(key) if table_size > 0 else None
+
+        if entry is not None:
+            table.move_to_end(key)
+            h = entry[2]
+        else:
+            h = heuristic_func(State(key=key, occupied=occupied))
+
+        f = g + h
+        if frame[1] is None or f < frame[1]:
+            frame[1] = f
+        if f > bound and (next_bound is None or f < next_bound):
+            next_bound = f
+
+        if key in on_path or f > bound:
+            continue
+
+        if table_size > 0:
+            # already searched from here with a g at least as small
+            if entry is not None and entry[0] == iteration and entry[1] <= g:
+                continue
+
+            table[key] = [iteration, g, h]
+            if len(table) > table_size:
+                table.popitem(last=False)
+
+        if is_goal_key(key):
+            return path + [key], None
+
+        path.append(key)
+        on_path.add(key)
+        successors = get_neighbours(key, occupied, multi_step)
+        frames.append([iter(successors), None])
+
+        if stats is not None:
+            _count_expansions(stats, 1, len(successors), len(frames), len(table), started, budget)
+
+    return None, next_bound
+
+
+# weights of the successive passes of anytime_search, the last one optimal
+ANYTIME_WEIGHTS = [3.0, 2.0, 1.5, 1.25, 1.0]
+
+
+def anytime_search(
+    start: State,
+    heuristic_func: Callable[[State], int],
+    multi_step: bool = False,
+    weights: Sequence[float] = ANYTIME_WEIGHTS,
+    improved: Optional[Callable[[State, float], None]] = None,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+
+    # ARA*: weighted A* ordered by g + w * h, repeated with smaller weights.
+    # Later passes keep the costs found so far and only expand states again
+    # once their cost improved, and skip states that cannot lead to anything
+    # cheaper than the best solution. A pass with weight w leaves a solution
+    # at most w times the optimal one; improved is called with each better
+    # solution, and running out of budget returns the best one found so far.
+    if stats is None:
+        stats = SearchStats()
+
+    get_successors = State.get_successors
+    if stats.timed:
+        heuristic_func = _timed(heuristic_func, stats, "heuristic_seconds")
+        get_successors = _timed(get_successors, stats, "successor_seconds")
+
+    start.cost = 0
+    if is_goal_state(start):
+        return start
+
+    start_key = canonical_key(start.id)
+    # unweighted heuristic and cheapest state found for every key, states
+    # waiting to be expanded in this pass, and states whose cost improved
+    # after this pass expanded them
+    hvals = {start_key: heuristic_func(start)}
+    best: Dict[int, State] = {start_key: start}
+    pending: Dict[int, State] = {start_key: start}
+    improved_closed: Dict[int, State] = {}
+    goal: Optional[State] = None
+
+    started = time.perf_counter() - stats.seconds
+    try:
+        for weight in weights:
+
+            pending.update(improved_closed)
+            improved_closed.clear()
+            closed: Set[int] = set()
+
+            frontier: Frontier = MinHeap()
+            if stats.timed:
+                frontier = _TimedFrontier(frontier, stats)
+            for key, state in pending.items():
+                state.hval = weight * hvals[key]
+                frontier.add(state)
+
+            while not frontier.is_empty():
+
+                curr_state = frontier.remove()
+                curr_key = canonical_key(curr_state.id)
+
+                if pending.get(curr_key) is not curr_state:
+                    stats.duplicate_pops += 1
+                    continue
+
+                # nothing left in this pass can improve on the solution, the
+                # state stays pending for the next one
+                if goal is not None and curr_state.get_priority() >= goal.cost:
+                    break
+
+                del pending[curr_key]
+                closed.add(curr_key)
+
+                successors = get_successors(curr_state, multi_step)
+                cost = curr_state.cost + 1
+
+                for neighbour in successors:
+
+                    key = canonical_key(neighbour.id)
+                    known = best.get(key)
+                    if known is not None and known.cost <= cost:
+                        stats.duplicates_avoided += 1
+                        continue
+
+                    if key not in hvals:
+                        hvals[key] = heuristic_func(neighbour)
+                    if goal is not None and cost + hvals[key] >= goal.cost:
+                        continue
+
+                    neighbour.cost = cost
+                    best[key] = neighbour
+
+                    if is_goal_state(neighbour):
+                        goal = neighbour
+                        if improved is not None:
+                            improved(goal, weight)
+                    elif key in closed:
+                        improved_closed[key] = neighbour
+                    else:
+                        neighbour.hval = weight * hvals[key]
+                        pending[key] = neighbour
+                        frontier.add(neighbour)
+
+                _count_expansions(
+                    stats, 1, len(successors), frontier.length(), len(best), started, budget
+                )
+
+    except BudgetExceeded:
+        if goal is None:
+            raise
+    finally:
+        stats.seconds = time.perf_counter() - started
+
+    return goal
+
+
+def replay_path(start: State, keys: List[int], multi_step: bool = False) -> State:
+
+    # rebuild the states of a path given as state ids by replaying its moves
+    start.cost = 0
+    curr_state = start
+
+    for key in keys[1:]:
+        for neighbour in curr_state.get_successors(multi_step):
+            if neighbour.id == key:
+                neighbour.cost = curr_state.cost + 1
+                curr_state = neighbour
+                break
+        else:
+            raise ValueError(f"state {key} does not follow state {curr_state.id}")
+
+    return curr_state
+
+
+def recreate_start_to_goal_path(goal: State) -> Tuple[int, List[State]]:
+
+    curr_state = goal
+    stack = Stack([])
+    path = []
+
+    while curr_state is not None:
+        stack.add(curr_state)
+        curr_state = curr_state.parent
+
+    while not stack.is_empty():
+        path.append(stack.remove())
+
+    return len(path) - 1, path
+
+
+def solve_dfs(
+    start: State,
+    multi_step: bool = False,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+    return search(
+        start, Stack(), lambda s: 0, multi_step, compact=True, stats=stats, budget=budget
+    )
+
+
+def solve_a_star(
+    start: State,
+    multi_step: bool = False,
+    heuristic: str = DEFAULT_HEURISTIC,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+    return search(
+        start,
+        BucketQueue(),
+        HEURISTICS[heuristic](start, multi_step),
+        multi_step,
+        compact=True,
+        detect_duplicates=True,
+        symmetric=True,
+        stats=stats,
+        budget=budget
+    )
+
+
+def solve_hda_star(
+    start: State,
+    multi_step: bool = False,
+    heuristic: str = DEFAULT_HEURISTIC,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+    return parallel_search(start, heuristic, multi_step=multi_step, stats=stats, budget=budget)
+
+
+# small next to the 53954 states of the classic layout, memory stays linear
+# in the depth plus this many entries. No table size makes IDA* practical on
+# full layouts: with h far below the 116 moves of the classic one, every
+# raise of the bound re-expands most reachable boards
+IDA_STAR_TABLE_SIZE = 4096
+
+
+def solve_ida_star(
+    start: State,
+    multi_step: bool = False,
+    heuristic: str = DEFAULT_HEURISTIC,
+    table_size: int = IDA_STAR_TABLE_SIZE,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+    return ida_star_search(
+        start, HEURISTICS[heuristic](start, multi_step), multi_step, table_size, stats, budget
+    )
+
+
+def solve_anytime(
+    start: State,
+    multi_step: bool = False,
+    heuristic: str = DEFAULT_HEURISTIC,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+    return anytime_search(
+        start, HEURISTICS[heuristic](start, multi_step), multi_step, stats=stats, budget=budget
+    )
+
+
+# wide enough for the classic layout and every board of the benchmark corpus
+BEAM_WIDTH = 1000
+
+
+def solve_beam(
+    start: State,
+    multi_step: bool = False,
+    heuristic: str = DEFAULT_HEURISTIC,
+    width: int = BEAM_WIDTH,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None
+) -> Optional[State]:
+    return search(
+        start,
+        Beam(width),
+        HEURISTICS[heuristic](start, multi_step),
+        multi_step,
+        compact=True,
+        detect_duplicates=True,
+        symmetric=True,
+        stats=stats,
+        budget=budget
+    )
+
+
+SOLVERS: Dict[str, Callable[[State, bool], Optional[State]]] = {
+    "dfs": solve_dfs,
+    "a_star": solve_a_star,
+    "bidirectional": bidirectional_search,
+    "hda_star": solve_hda_star,
+    "ida_star": solve_ida_star,
+    "anytime": solve_anytime,
+    "beam": solve_beam
+}
+
+# solvers taking a heuristic= name from HEURISTICS; every solver takes
+# stats= and budget=
+HEURISTIC_SOLVERS = ["a_star", "hda_star", "ida_star", "anytime", "beam"]
+
+# solvers whose solutions are optimal, the only ones a distance database
+# may answer for
+OPTIMAL_SOLVERS = ["a_star", "bidirectional", "hda_star", "ida_star"]
+
+
+def solver_label(
+    solver: str, heuristic: Optional[str] = None, beam_width: Optional[int] = None
+) -> str:
+
+    # a solver with the options its solutions depend on, e.g. "beam/pattern/500"
+    parts = [solver]
+    if solver in HEURISTIC_SOLVERS:
+        parts.append(heuristic or DEFAULT_HEURISTIC)
+    if solver == "beam":
+        parts.append(str(beam_width or BEAM_WIDTH))
+
+    return "/".join(parts)
+
+
+def solve_with_cache(
+    start: State,
+    solver: str,
+    multi_step: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+    stats: Optional[SearchStats] = None,
+    budget: Optional[SearchBudget] = None,
+    distances: Optional[DistanceDatabase] = None,
+    cache_filename: Optional[str] = None
+) -> Tuple[Optional[State], bool]:
+
+    # (goal, whether the cache answered) from the cache, then the database,
+    # then the solver; BudgetExceeded is left to the caller
+    options = options or {}
+    label = solver_label(solver, options.get("heuristic"), options.get("width"))
+
+    if cache_filename is not None:
+        with SolutionCache(cache_filename) as cache:
+            goal = cache.get(start, label, multi_step)
+        if goal is not None:
+            return goal, True
+
+    goal = None
+    if distances is not None and distances.multi_step == multi_step and solver in OPTIMAL_SOLVERS:
+        goal = database_search(start, distances, multi_step)
+
+    # the database does not cover this board, fall back to searching
+    if goal is None:
+        goal = SOLVERS[solver](start, multi_step, stats=stats, budget=budget, **options)
+
+    # a budget may stop an anytime search short of its best solution, any
+    # other solver either finishes its search or raises
+    if goal is not None and cache_filename is not None and (solver != "anytime" or budget is None):
+        with SolutionCache(cache_filename) as cache:
+            cache.put(goal, label, multi_step)
+
+    return goal, False
+
+
+def format_state(state: State) -> List[str]:
+    # one string of output symbols per board row
+    return ["".join(str(col) for col in row) for row in state.to_grid()]
+
+
+def write_path(filename: str, cost: int, path: List[State]) -> None:
+
+    with open(filename, mode='w') as f:
+        f.write(f"Cost of the solution: {cost}\n")
+
+        for state in path:
+            f.write("".join(row + "\n" for row in format_state(state)) + "\n")
+
+
+def build_database(
+    input_filename: str, database_filename: str, multi_step: bool = False
+) -> None:
+
+    start_state = State(generate_grid(input_filename))
+    distances = build_distance_database(start_state, multi_step)
+    write_distance_database(database_filename, distances, multi_step)
+
+    print(f"Wrote {len(distances)} states to {database_filename}")
+
+
+def _write_solution(
+    name: str,
+    solver: str,
+    options: Dict[str, Any],
+    grid: Grid,
+    filename: str,
+    multi_step: bool,
+    database_filename: Optional[str],
+    report_stats: bool = False,
+    progress_every: int = 0,
+    budget: Optional[SearchBudget] = None,
+    cache_filename: Optional[str] = None
+) -> bool:
+
+    goal = _run_solver(
+        name, solver, options, State(grid), multi_step, database_filename,
+        report_stats, progress_every, budget, cache_filename
+    )
+    if goal is None:
+        return False
+
+    cost, sol_path = recreate_start_to_goal_path(goal)
+
+    # a concurrent run may stop this process at any time, never leave a
+    # half written output behind
+    write_path(filename + ".tmp", cost, sol_path)
+    os.replace(filename + ".tmp", filename)
+
+    return True
+
+
+def _run_solver(
+    name: str,
+    solver: str,
+    options: Dict[str, Any],
+    start: State,
+    multi_step: bool,
+    database_filename: Optional[str],
+    report_stats: bool,
+    progress_every: int,
+    budget: Optional[SearchBudget],
+    cache_filename: Optional[str]
+) -> Optional[State]:
+
+    stats = None
+    if report_stats or progress_every:
+        stats = SearchStats(timed=report_stats, progress_every=progress_every)
+
+    distances = DistanceDatabase(database_filename) if database_filename is not None else None
+
+    try:
+        goal, cached = solve_with_cache(
+            start, solver, multi_step, options, stats, budget, distances, cache_filename
+        )
+    except BudgetExceeded as e:
+        # the partial stats still say how far the search got
+        if report_stats:
+            print(json.dumps({"search": name, **e.to_dict()}), file=sys.stderr)
+        print(f"{name} stopped: {e}")
+        return None
+    finally:
+        if distances is not None:
+            distances.close()
+
+    # one JSON line per search, kept off stdout
+    if report_stats:
+        summary = {"cached": True} if cached else stats.to_dict()
+        print(json.dumps({"search": name, **summary}), file=sys.stderr)
+
+    if goal is None:
+        print(f"{name} could not find a solution")
+
+    return goal
+
+
+def _write_solution_process(*args) -> None:
+    sys.exit(0 if _write_solution(*args) else 1)
+
+
+def _run_concurrently(jobs: List[Tuple], first_wins: bool) -> None:
+
+    processes = {}
+
+    for job in jobs:
+        process = multiprocessing.Process(target=_write_solution_process, args=job)
+        process.start()
+        processes[process.sentinel] = process
+
+    while processes:
+        for sentinel in multiprocessing.connection.wait(list(processes)):
+            process = processes.pop(sentinel)
+            process.join()
+
+            if first_wins and process.exitcode == 0:
+                for loser in processes.values():
+                    loser.terminate()
+                    loser.join()
+                processes.clear()
+                break
+
+
+def main(
+    input_filename: str,
+    dfs_filename: str,
+    a_star_filename: str,
+    multi_step: bool = False,
+    database_filename: Optional[str] = None,
+    concurrent: bool = False,
+    first_wins: bool = False,
+    solver: str = "a_star",
+    heuristic: Optional[str] = None,
+    beam_width: Optional[int] = None,
+    table_size: Optional[int] = None,
+    report_stats: bool = False,
+    progress_every: int = 0,
+    budget: Optional[SearchBudget] = None,
+    cache_filename: Optional[str] = None
+) -> None:
+
+    try:
+        grid = generate_grid(input_filename)
+    except ValueError as e:
+        print(f"invalid board: {e}")
+        return
+
+    options: Dict[str, Any] = {}
+    if heuristic is not None:
+        options["heuristic"] = heuristic
+    if beam_width is not None:
+        options["width"] = beam_width
+    if table_size is not None:
+        options["table_size"] = table_size
+
+    jobs = [
+        (
+            "DFS",
+            "dfs",
+            {},
+            grid,
+            dfs_filename,
+            multi_step,
+            database_filename,
+            report_stats,
+            progress_every,
+            budget,
+            cache_filename
+        ),
+        (
+            "A*" if solver == "a_star" else solver,
+            solver,
+            options,
+            grid,
+            a_star_filename,
+            multi_step,
+            database_filename,
+            report_stats,
+            progress_every,
+            budget,
+            cache_filename
+        )
+    ]
+
+    if concurrent or first_wins:
+        _run_concurrently(jobs, first_wins)
+    else:
+        for job in jobs:
+            _write_solution(*job)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        usage="python3 hrd.py  <input file>  <DFS output file>  <A* output file>"
+    )
+    parser.add_argument("input_filename", metavar="<input file>")
+    parser.add_argument("dfs_filename", metavar="<DFS output file>", nargs="?")
+    parser.add_argument("a_star_filename", metavar="<A* output file>", nargs="?")
+    parser.add_argument(
+        "--multi-step",
+        action="store_true",
+        help="count consecutive slides of the same piece as one move"
+    )
+    parser.add_argument(
+        "--solver",
+        choices=sorted(SOLVERS),
+        default="a_star",
+        help="search used for the A* output file; ida_star is not practical on full layouts, "
+        "it takes minutes on the classic one"
+    )
+    parser.add_argument(
+        "--heuristic",
+        choices=sorted(HEURISTICS),
+        help=f"admissible heuristic for {', '.join(HEURISTIC_SOLVERS)}, defaults to {DEFAULT_HEURISTIC}"
+    )
+    parser.add_argument(
+        "--beam-width",
+        type=int,
+        metavar="<states>",
+        help=f"states kept per depth by the beam solver, defaults to {BEAM_WIDTH}"
+    )
+    parser.add_argument(
+        "--table-size",
+        type=int,
+        metavar="<states>",
+        help=f"transposition table entries of the ida_star solver, 0 for none, defaults to {IDA_STAR_TABLE_SIZE}"
+    )
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="run DFS and A* in separate processes at the same time"
+    )
+    parser.add_argument(
+        "--first-wins",
+        action="store_true",
+        help="run concurrently and stop the other search once one output is written"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print a JSON summary of the work each search did to stderr"
+    )
+    parser.add_argument(
+        "--progress",
+        type=int,
+        default=0,
+        metavar="<expansions>",
+        help="print a progress line to stderr every this many expansions"
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        metavar="<seconds>",
+        help="give up a search after this long"
+    )
+    parser.add_argument(
+        "--max-expansions",
+        type=int,
+        metavar="<expansions>",
+        help="give up a search after expanding this many states"
+    )
+    parser.add_argument(
+        "--max-explored",
+        type=int,
+        metavar="<states>",
+        help="give up a search once it keeps this many explored states"
+    )
+    parser.add_argument(
+        "--db",
+        metavar="<database file>",
+        help="answer the A* output from a distance database instead of searching"
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="<cache file>",
+        help="answer from and add to a file of earlier solutions, created if missing"
+    )
+    parser.add_argument(
+        "--build-db",
+        metavar="<database file>",
+        help="write the distance to goal of every reachable state and exit"
+    )
+    args = parser.parse_args()
+
+    if args.build_db is not None:
+        build_database(args.input_filename, args.build_db, args.multi_step)
+        exit()
+
+    if args.a_star_filename is None:
+        parser.error("expected <DFS output file> and <A* output file>")
+
+    if args.heuristic is not None and args.solver not in HEURISTIC_SOLVERS:
+        parser.error(f"--solver {args.solver} does not use a heuristic")
+
+    if args.table_size is not None and args.solver != "ida_star":
+        parser.error("--table-size only applies to --solver ida_star")
+
+    if args.beam_width is not None and args.solver != "beam":
+        parser.error("--beam-width only applies to --solver beam")
+
+    budget = None
+    if (args.max_seconds, args.max_expansions, args.max_explored) != (None, None, None):
+        budget = SearchBudget(args.max_seconds, args.max_expansions, args.max_explored)
 
     main(
-        input_filename=argv[1],
-        dfs_filename=argv[2],
-        a_star_filename=argv[3]
+        input_filename=args.input_filename,
+        dfs_filename=args.dfs_filename,
+        a_star_filename=args.a_star_filename,
+        multi_step=args.multi_step,
+        database_filename=args.db,
+        concurrent=args.concurrent,
+        first_wins=args.first_wins,
+        solver=args.solver,
+        heuristic=args.heuristic,
+        beam_width=args.beam_width,
+        table_size=args.table_size,
+        report_stats=args.stats,
+        progress_every=args.progress,
+        budget=budget,
+        cache_filename=args.cache
     )
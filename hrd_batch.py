@@ -0,0 +1,247 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+from functools import partial
+import glob
+import json
+import os
+import time
+from typing import *
+
+from hrd import (
+    SOLVERS,
+    BudgetExceeded,
+    SearchBudget,
+    State,
+    format_state,
+    generate_grid,
+    recreate_start_to_goal_path,
+    solve_with_cache,
+    write_path
+)
+
+
+Result = Dict[str, Any]
+
+
+def collect_puzzles(sources: List[str], manifest: Optional[str] = None) -> List[str]:
+
+    puzzles = []
+
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if os.path.isfile(os.path.join(source, name)):
+                    puzzles.append(os.path.join(source, name))
+        elif glob.has_magic(source):
+            puzzles.extend(sorted(glob.glob(source)))
+        else:
+            puzzles.append(source)
+
+    if manifest is not None:
+        manifest_dir = os.path.dirname(manifest)
+
+        # one puzzle file per line, relative to the manifest
+        with open(manifest) as manifest_file:
+            for line in manifest_file.readlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    puzzles.append(os.path.join(manifest_dir, line))
+
+    return puzzles
+
+
+def solve_puzzle(
+    puzzle_file_name: str,
+    algorithms: List[str],
+    multi_step: bool = False,
+    output_dir: Optional[str] = None,
+    budget: Optional[SearchBudget] = None,
+    cache_filename: Optional[str] = None
+) -> Result:
+
+    result: Result = {"puzzle": puzzle_file_name, "solutions": {}}
+
+    try:
+        # boards that do not fit fail here rather than in a solver
+        grid = generate_grid(puzzle_file_name)
+    except (OSError, ValueError) as e:
+        result["error"] = str(e)
+        return result
+
+    for algorithm in algorithms:
+
+        goal, solution = _solve(grid, algorithm, multi_step, budget, cache_filename)
+
+        if goal is not None:
+            cost, path = recreate_start_to_goal_path(goal)
+            solution["cost"] = cost
+
+            if output_dir is not None:
+                name = os.path.splitext(os.path.basename(puzzle_file_name))[0]
+                write_path(os.path.join(output_dir, f"{name}.{algorithm}.txt"), cost, path)
+            else:
+                solution["path"] = [format_state(state) for state in path]
+
+        result["solutions"][algorithm] = solution
+
+    return result
+
+
+def _solve(
+    grid: List[List[int]],
+    algorithm: str,
+    multi_step: bool,
+    budget: Optional[SearchBudget] = None,
+    cache_filename: Optional[str] = None
+) -> Tuple[Optional[State], Result]:
+
+    started = time.perf_counter()
+    solution: Result = {"cost": None}
+    goal = None
+
+    try:
+        goal, cached = solve_with_cache(
+            State(grid), algorithm, multi_step, budget=budget, cache_filename=cache_filename
+        )
+        if cached:
+            solution["cached"] = True
+    except BudgetExceeded as e:
+        solution.update(e.to_dict())
+    except Exception as e:
+        # one failing solver must not take the rest of the batch with it
+        solution["error"] = f"{type(e).__name__}: {e}"
+
+    solution["seconds"] = time.perf_counter() - started
+    return goal, solution
+
+
+def run_batch(
+    puzzles: List[str],
+    algorithms: List[str],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    multi_step: bool = False,
+    output_dir: Optional[str] = None,
+    jsonl_filename: Optional[str] = None,
+    budget: Optional[SearchBudget] = None,
+    cache_filename: Optional[str] = None
+) -> List[Result]:
+
+    results = []
+    solve = partial(
+        solve_puzzle,
+        algorithms=algorithms,
+        multi_step=multi_step,
+        output_dir=output_dir,
+        budget=budget,
+        cache_filename=cache_filename
+    )
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jsonl_file = open(jsonl_filename, mode='w') if jsonl_filename is not None else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # results come back in puzzle order as soon as each one is done
+            for result in executor.map(solve, puzzles, chunksize=chunksize):
+                if jsonl_file is not None:
+                    jsonl_file.write(json.dumps(result) + "\n")
+                    jsonl_file.flush()
+                results.append(result)
+    finally:
+        if jsonl_file is not None:
+            jsonl_file.close()
+
+    return results
+
+
+def print_summary(results: List[Result], wall_seconds: float) -> None:
+
+    total_seconds = 0.0
+    failures = 0
+
+    for result in results:
+        if "error" in result:
+            failures += 1
+            print(f"{result['puzzle']}  error: {result['error']}")
+            continue
+
+        for algorithm, solution in result["solutions"].items():
+            total_seconds += solution["seconds"]
+            if "error" in solution:
+                cost = f"error, {solution['error']}"
+            elif "budget_exceeded" in solution:
+                cost = f"stopped, {solution['budget_exceeded']}"
+            else:
+                cost = solution["cost"] if solution["cost"] is not None else "unsolved"
+            cached = "  cached" if solution.get("cached") else ""
+            print(f"{result['puzzle']}  {algorithm}  cost {cost}  {solution['seconds']:.3f}s{cached}")
+
+    print(
+        f"{len(results)} puzzles, {failures} failed, "
+        f"{total_seconds:.3f}s solving, {wall_seconds:.3f}s wall time"
+    )
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Solve many puzzle files on a pool of worker processes."
+    )
+    parser.add_argument(
+        "sources",
+        metavar="<puzzle>",
+        nargs="*",
+        help="puzzle file, directory of puzzle files or glob pattern"
+    )
+    parser.add_argument("--manifest", help="file listing one puzzle file per line")
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        choices=sorted(SOLVERS),
+        default=["dfs", "a_star"]
+    )
+    parser.add_argument("--workers", type=int, help="defaults to the number of CPUs")
+    parser.add_argument(
+        "--chunksize", type=int, default=1, help="puzzles handed to a worker at a time"
+    )
+    parser.add_argument("--multi-step", action="store_true")
+    parser.add_argument("--output-dir", help="write <puzzle>.<algorithm>.txt files here")
+    parser.add_argument("--jsonl", help="write one JSON result per puzzle to this file")
+    parser.add_argument("--cache", help="answer from and add to this file of earlier solutions")
+    parser.add_argument(
+        "--max-seconds", type=float, help="give up a search after this many seconds"
+    )
+    parser.add_argument(
+        "--max-expansions", type=int, help="give up a search after this many expansions"
+    )
+    parser.add_argument(
+        "--max-explored", type=int, help="give up a search past this many explored states"
+    )
+    args = parser.parse_args()
+
+    if args.output_dir is None and args.jsonl is None:
+        parser.error("expected --output-dir and/or --jsonl")
+
+    puzzles = collect_puzzles(args.sources, args.manifest)
+
+    budget = None
+    if (args.max_seconds, args.max_expansions, args.max_explored) != (None, None, None):
+        budget = SearchBudget(args.max_seconds, args.max_expansions, args.max_explored)
+
+    started = time.perf_counter()
+    results = run_batch(
+        puzzles,
+        args.algorithms,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        multi_step=args.multi_step,
+        output_dir=args.output_dir,
+        jsonl_filename=args.jsonl,
+        budget=budget,
+        cache_filename=args.cache
+    )
+
+    print_summary(results, time.perf_counter() - started)
@@ -0,0 +1,449 @@
+import argparse
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import *
+
+from hrd import (
+    BOARD_COLS,
+    BOARD_ROWS,
+    CLASS_SHAPES,
+    HEURISTICS,
+    PIECE_CLASSES,
+    SOLVERS,
+    BucketQueue,
+    BudgetExceeded,
+    CachedHeuristic,
+    Grid,
+    MinHeap,
+    Piece,
+    PieceClass,
+    PieceType,
+    SearchBudget,
+    SearchStats,
+    State,
+    build_distance_database,
+    generate_grid,
+    get_neighbours,
+    manhattan_distance,
+    recreate_start_to_goal_path,
+    search
+)
+
+
+Result = Dict[str, Any]
+
+# a solver stops itself at the timeout, its process is only killed this long
+# after it
+TIMEOUT_GRACE_SECONDS = 1.0
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+CLASSIC_PUZZLE = os.path.join(CORPUS_DIR, "heng_dao_li_ma.txt")
+
+
+def _traced(create: Callable[[], Any]) -> Tuple[Any, int, int]:
+
+    # (value, bytes, memory blocks) still allocated after create returns
+    tracemalloc.start()
+    try:
+        value = create()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    statistics = snapshot.statistics("filename")
+    return value, sum(stat.size for stat in statistics), sum(stat.count for stat in statistics)
+
+
+def measure_objects(start: State, count: int = 100000) -> Result:
+
+    # bytes and allocations per instance of the objects a search creates the most
+    key, occupied, old_index, new_index = get_neighbours(start.id, start.occupied)[0]
+
+    def create_states() -> List[State]:
+        return [
+            State(parent=start, key=key, occupied=occupied, moved=(old_index, new_index))
+            for _ in range(count)
+        ]
+
+    def create_pieces() -> List[Piece]:
+        return [Piece(1, 2, 3, 0, 2) for _ in range(count)]
+
+    def create_heap_items() -> MinHeap:
+        heap = MinHeap()
+        for _ in range(count):
+            heap.add(start)
+        return heap
+
+    result: Result = {}
+
+    for name, create in [
+        ("state", create_states),
+        ("piece", create_pieces),
+        ("min_heap_item", create_heap_items)
+    ]:
+        _, size, blocks = _traced(create)
+        result[name] = {"bytes": size / count, "allocations": blocks / count}
+
+    return result
+
+
+def measure_search(start_grid: List[List[int]], multi_step: bool = False) -> Result:
+
+    started = time.perf_counter()
+    search(State(start_grid), BucketQueue(), manhattan_distance, multi_step, compact=True)
+    seconds = time.perf_counter() - started
+
+    # a second run under tracemalloc, which slows it down too much to time
+    tracemalloc.start()
+    try:
+        search(State(start_grid), BucketQueue(), manhattan_distance, multi_step, compact=True)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def measure_heuristics(start_grid: List[List[int]], multi_step: bool = False) -> Result:
+
+    # nodes A* expands with every registered heuristic
+    result: Result = {}
+
+    for name, create_heuristic in HEURISTICS.items():
+        started = time.perf_counter()
+        heuristic_func = create_heuristic(State(start_grid), multi_step)
+        build_seconds = time.perf_counter() - started
+
+        stats = SearchStats()
+        started = time.perf_counter()
+        goal = search(
+            State(start_grid),
+            BucketQueue(),
+            heuristic_func,
+            multi_step,
+            compact=True,
+            detect_duplicates=True,
+            symmetric=True,
+            stats=stats
+        )
+
+        seconds = time.perf_counter() - started
+
+        # without duplicate detection every generated board is evaluated,
+        # which is where a cache of heuristic values pays off
+        cached = CachedHeuristic(heuristic_func, symmetric=True)
+        started = time.perf_counter()
+        search(State(start_grid), BucketQueue(), cached, multi_step, compact=True, symmetric=True)
+
+        result[name] = {
+            "build_seconds": build_seconds,
+            "seconds": seconds,
+            "expanded": stats.expanded,
+            "cost": recreate_start_to_goal_path(goal)[0] if goal is not None else None,
+            "cached_seconds": time.perf_counter() - started,
+            "cache_hits": cached.hits,
+            "cache_misses": cached.misses
+        }
+
+    return result
+
+
+def puzzle_grid(state: State) -> Grid:
+
+    # a board in the input format: 1 for the 2x2 piece, 2 to 6 for the 1x2
+    # pieces and 7 for the single pieces
+    grid = [[PieceType.EMPTY] * BOARD_COLS for _ in range(BOARD_ROWS)]
+    next_symbol = 2
+
+    for cls in PIECE_CLASSES:
+        rows, cols = CLASS_SHAPES[cls]
+        anchors = state.anchors(cls)
+
+        while anchors:
+            anchor = anchors & -anchors
+            anchors ^= anchor
+            top, left = divmod(anchor.bit_length() - 1, BOARD_COLS)
+
+            if cls == PieceClass.TwoByTwo:
+                symbol = PieceType.TwoByTwo
+            elif cls == PieceClass.OneByOne:
+                symbol = PieceType.OneByOne
+            else:
+                symbol = next_symbol
+                next_symbol += 1
+
+            for row in range(top, top + rows):
+                for col in range(left, left + cols):
+                    grid[row][col] = symbol
+
+    return grid
+
+
+def load_corpus(directory: str = CORPUS_DIR) -> List[Tuple[str, Grid]]:
+
+    corpus = []
+
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".txt"):
+            grid = generate_grid(os.path.join(directory, name))
+            corpus.append((os.path.splitext(name)[0], grid))
+
+    return corpus
+
+
+def random_boards(count: int, seed: int = 0, min_moves: int = 30) -> List[Tuple[str, Grid]]:
+
+    # solvable by construction: drawn from every board of the classic pieces
+    # that can reach the exit in at least min_moves, the same for a seed
+    rng = random.Random(seed)
+    start = State(generate_grid(CLASSIC_PUZZLE))
+    distances = build_distance_database(start)
+    candidates = sorted(key for key, distance in distances.items() if distance >= min_moves)
+    boards = []
+
+    for board in range(count):
+        key = rng.choice(candidates)
+        boards.append((f"random-{seed}-{board}", puzzle_grid(State(key=key, occupied=0))))
+
+    return boards
+
+
+def measure_solver(
+    name: str, grid: Grid, algorithm: str, multi_step: bool = False, timeout: Optional[float] = None
+) -> Result:
+
+    # every run gets a fresh process, so peak RSS is its own and a run that
+    # goes over the timeout can be stopped. It is not a daemon, hda_star
+    # starts worker processes of its own, and the solver's budget stops it
+    # at the timeout so those workers are shut down with it
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_measure_solver_process, args=(grid, algorithm, multi_step, timeout, sender)
+    )
+    process.start()
+    sender.close()
+
+    result: Result = {
+        "puzzle": name,
+        "board": "".join("".join(str(col) for col in row) for row in grid),
+        "algorithm": algorithm,
+        "multi_step": multi_step
+    }
+
+    try:
+        if receiver.poll(None if timeout is None else timeout + TIMEOUT_GRACE_SECONDS):
+            result.update(receiver.recv())
+        else:
+            result["error"] = f"timed out after {timeout}s"
+    except EOFError:
+        result["error"] = "solver process exited unexpectedly"
+    finally:
+        process.terminate()
+        process.join()
+        receiver.close()
+
+    return result
+
+
+def _measure_solver_process(
+    grid: Grid,
+    algorithm: str,
+    multi_step: bool,
+    timeout: Optional[float],
+    sender: multiprocessing.connection.Connection
+) -> None:
+
+    solver = SOLVERS[algorithm]
+    stats = SearchStats()
+    budget = SearchBudget(timeout) if timeout is not None else None
+
+    started = time.perf_counter()
+    try:
+        goal = solver(State(grid), multi_step, stats=stats, budget=budget)
+    except BudgetExceeded:
+        sender.send({"error": f"timed out after {timeout}s"})
+        sender.close()
+        return
+    seconds = time.perf_counter() - started
+
+    sender.send({
+        "seconds": seconds,
+        "cost": recreate_start_to_goal_path(goal)[0] if goal is not None else None,
+        "expanded": stats.expanded,
+        "peak_frontier": stats.peak_frontier,
+        # kilobytes on Linux, the largest of this process and the workers
+        # hda_star ran
+        "peak_rss_kb": max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        )
+    })
+    sender.close()
+
+
+def run_corpus(
+    puzzles: List[Tuple[str, Grid]],
+    algorithms: List[str],
+    multi_step: bool = False,
+    timeout: Optional[float] = None
+) -> Result:
+
+    runs = []
+
+    for name, grid in puzzles:
+        for algorithm in algorithms:
+            run = measure_solver(name, grid, algorithm, multi_step, timeout)
+            runs.append(run)
+            print(_format_run(run), file=sys.stderr)
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "runs": runs
+    }
+
+
+def _format_run(run: Result) -> str:
+
+    if "error" in run:
+        return f"{run['puzzle']}  {run['algorithm']}  error: {run['error']}"
+
+    return (
+        f"{run['puzzle']}  {run['algorithm']}  cost {run['cost']}  {run['seconds']:.3f}s  "
+        f"expanded {run['expanded']}  peak frontier {run['peak_frontier']}  "
+        f"peak RSS {run['peak_rss_kb']} KiB"
+    )
+
+
+def _git_commit() -> Optional[str]:
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline: Result, results: Result) -> List[str]:
+
+    # one line per run found in both, flagging changed costs
+    lines = []
+    baseline_runs = {
+        (run["board"], run["algorithm"], run["multi_step"]): run for run in baseline["runs"]
+    }
+
+    for run in results["runs"]:
+        old = baseline_runs.get((run["board"], run["algorithm"], run["multi_step"]))
+        if old is None or "error" in old or "error" in run:
+            continue
+
+        line = (
+            f"{run['puzzle']}  {run['algorithm']}  {old['seconds']:.3f}s -> {run['seconds']:.3f}s "
+            f"({run['seconds'] / max(old['seconds'], 1e-9):.2f}x)"
+        )
+        if old["expanded"] is not None and run["expanded"] is not None:
+            line += f"  expanded {old['expanded']} -> {run['expanded']}"
+        if old["cost"] != run["cost"]:
+            line += f"  COST CHANGED {old['cost']} -> {run['cost']}"
+
+        lines.append(line)
+
+    return lines
+
+
+def _run_memory(args: argparse.Namespace) -> None:
+
+    grid = generate_grid(args.input_filename)
+    results = {
+        "objects": measure_objects(State(grid), args.count),
+        "a_star": measure_search(grid, args.multi_step),
+        "heuristics": measure_heuristics(grid, args.multi_step)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, sizes in results["objects"].items():
+        print(f"{name}  {sizes['bytes']:.0f} bytes  {sizes['allocations']:.2f} allocations")
+    print(
+        f"a_star  {results['a_star']['seconds']:.3f}s  "
+        f"peak {results['a_star']['peak_bytes'] / 1024:.0f} KiB"
+    )
+    for name, run in results["heuristics"].items():
+        print(
+            f"{name}  cost {run['cost']}  expanded {run['expanded']}  "
+            f"{run['build_seconds']:.3f}s build  {run['seconds']:.3f}s search  "
+            f"cache {run['cache_hits']} hits {run['cache_misses']} misses"
+        )
+
+
+def _run_corpus(args: argparse.Namespace) -> None:
+
+    puzzles = load_corpus(args.corpus)
+    puzzles.extend(random_boards(args.random, args.seed, args.min_moves))
+
+    results = run_corpus(puzzles, args.algorithms, args.multi_step, args.timeout)
+
+    if args.output is not None:
+        with open(args.output, mode='w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            for line in compare_results(json.load(f), results):
+                print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmarks for the Huarong Dao solvers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    memory_parser = subparsers.add_parser(
+        "memory", help="memory used by A* and the nodes each heuristic expands"
+    )
+    memory_parser.add_argument("input_filename", metavar="<input file>")
+    memory_parser.add_argument("--multi-step", action="store_true")
+    memory_parser.add_argument("--count", type=int, default=100000, help="instances per object")
+    memory_parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    memory_parser.set_defaults(run=_run_memory)
+
+    corpus_parser = subparsers.add_parser(
+        "corpus", help="run solvers over the corpus and random boards, one process per run"
+    )
+    corpus_parser.add_argument("--corpus", default=CORPUS_DIR, help="directory of puzzle files")
+    corpus_parser.add_argument(
+        "--algorithms", nargs="+", choices=sorted(SOLVERS), default=["dfs", "a_star", "bidirectional"]
+    )
+    corpus_parser.add_argument("--multi-step", action="store_true")
+    corpus_parser.add_argument("--random", type=int, default=5, help="random boards to add")
+    corpus_parser.add_argument("--seed", type=int, default=0)
+    corpus_parser.add_argument(
+        "--min-moves", type=int, default=30, help="fewest single slides a random board needs"
+    )
+    corpus_parser.add_argument("--timeout", type=float, default=300, help="seconds per run")
+    corpus_parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    corpus_parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    corpus_parser.set_defaults(run=_run_corpus)
+
+    args = parser.parse_args()
+    args.run(args)
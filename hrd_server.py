@@ -0,0 +1,322 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import *
+from urllib.parse import parse_qs, urlsplit
+
+from hrd import (
+    HEURISTIC_SOLVERS,
+    HEURISTICS,
+    SOLVERS,
+    BudgetExceeded,
+    DistanceDatabase,
+    SearchBudget,
+    State,
+    format_state,
+    parse_grid,
+    recreate_start_to_goal_path,
+    solve_with_cache
+)
+
+
+Result = Dict[str, Any]
+
+# a board is five rows of four digits, a request body much longer is not one
+MAX_BODY_BYTES = 4096
+
+# a worker stops a budgeted search by itself, the server only gives up on it
+# this long after the request's timeout
+TIMEOUT_GRACE_SECONDS = 1.0
+
+STATUS_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout"
+}
+
+# set once in every worker process by _init_worker
+_database: Optional[DistanceDatabase] = None
+_cache_filename: Optional[str] = None
+
+
+def _init_worker(database_filename: Optional[str], cache_filename: Optional[str]) -> None:
+
+    global _database, _cache_filename
+
+    # mapped once per worker rather than once per request
+    if database_filename is not None:
+        _database = DistanceDatabase(database_filename)
+    _cache_filename = cache_filename
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def solve_grid(
+    grid: List[List[int]],
+    algorithm: str = "a_star",
+    multi_step: bool = False,
+    heuristic: Optional[str] = None,
+    seconds: Optional[float] = None
+) -> Result:
+
+    started = time.perf_counter()
+    result: Result = {"algorithm": algorithm, "multi_step": multi_step, "cost": None}
+    goal = None
+
+    try:
+        goal, cached = solve_with_cache(
+            State(grid),
+            algorithm,
+            multi_step,
+            {"heuristic": heuristic} if heuristic is not None else {},
+            budget=SearchBudget(seconds) if seconds is not None else None,
+            distances=_database,
+            cache_filename=_cache_filename
+        )
+        if cached:
+            result["cached"] = True
+    except BudgetExceeded as e:
+        result.update(e.to_dict())
+
+    if goal is not None:
+        cost, path = recreate_start_to_goal_path(goal)
+        result["cost"] = cost
+        result["path"] = [format_state(state) for state in path]
+
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+class SolverServer:
+
+    # answers POST /solve with a board in the input format as its body and
+    # GET /health, one request per connection. Boards are solved on a pool of
+    # worker processes started up front; at most one request per worker runs
+    # at a time, up to max_queue more wait for one and the rest are refused
+
+    workers: int
+    max_queue: int
+    timeout: float
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: int = 64,
+        timeout: float = 30.0,
+        database_filename: Optional[str] = None,
+        cache_filename: Optional[str] = None
+    ) -> None:
+
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(database_filename, cache_filename)
+        )
+        self._slots = asyncio.Semaphore(self.workers)
+        self._queued = 0
+        self._running = 0
+
+    async def start(self) -> None:
+
+        # one task per worker at once makes the pool start all of them now
+        # instead of on the first requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers))
+        )
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def health(self) -> Result:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": self._queued,
+            "max_queue": self.max_queue
+        }
+
+    async def solve(
+        self,
+        board: str,
+        algorithm: str = "a_star",
+        multi_step: bool = False,
+        heuristic: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[int, Result]:
+
+        if algorithm not in SOLVERS:
+            return 400, {"error": f"unknown algorithm {algorithm}"}
+        if heuristic is not None and (
+            heuristic not in HEURISTICS or algorithm not in HEURISTIC_SOLVERS
+        ):
+            return 400, {"error": f"{algorithm} does not take heuristic {heuristic}"}
+
+        try:
+            grid = parse_grid(board)
+        except ValueError as e:
+            return 400, {"error": f"invalid board: {e}"}
+
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+
+        if self._slots.locked() and self._queued >= self.max_queue:
+            return 503, {"error": "too many requests waiting", **self.health()}
+
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self._pool, solve_grid, grid, algorithm, multi_step, heuristic, timeout
+        )
+        future.add_done_callback(self._release)
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(future), timeout + TIMEOUT_GRACE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            # the worker, and its slot, stay busy until the search notices its
+            # budget ran out
+            return 504, {"error": f"no solution within {timeout}s"}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+        if "budget_exceeded" in result:
+            return 504, result
+        return 200, result
+
+    def _release(self, future: asyncio.Future) -> None:
+
+        self._running -= 1
+        self._slots.release()
+
+        # nobody waits for a result that came in after its timeout
+        if not future.cancelled():
+            future.exception()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+
+        try:
+            status, result = await self._respond(reader)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, result = 400, {"error": f"malformed request: {e}"}
+
+        body = json.dumps(result).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, reader: asyncio.StreamReader) -> Tuple[int, Result]:
+
+        method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": f"a board takes at most {MAX_BODY_BYTES} bytes"}
+        body = await reader.readexactly(length)
+
+        url = urlsplit(target)
+        if url.path not in ["/solve", "/health"]:
+            return 404, {"error": f"no such path {url.path}"}
+        if url.path == "/health":
+            return (200, self.health()) if method == "GET" else (405, {"error": "expected GET"})
+        if method != "POST":
+            return 405, {"error": "expected POST"}
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return await self.solve(
+            body.decode(),
+            params.get("algorithm", "a_star"),
+            params.get("multi_step", "0").lower() in ["1", "true", "yes"],
+            params.get("heuristic"),
+            float(params["timeout"]) if "timeout" in params else None
+        )
+
+
+async def serve(
+    solver_server: SolverServer,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    unix_path: Optional[str] = None
+) -> None:
+
+    await solver_server.start()
+
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(solver_server.handle, unix_path)
+    else:
+        server = await asyncio.start_server(solver_server.handle, host, port)
+
+    address = unix_path or "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"{solver_server.workers} workers serving on {address}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        solver_server.close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Solve boards posted over HTTP on a pool of warm worker processes."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", metavar="<socket file>", help="listen on a Unix socket instead")
+    parser.add_argument("--workers", type=int, help="defaults to the number of CPUs")
+    parser.add_argument(
+        "--max-queue", type=int, default=64, help="requests waiting for a worker before refusing more"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="longest a request may take, in seconds"
+    )
+    parser.add_argument("--db", metavar="<database file>", help="distance database for every worker")
+    parser.add_argument("--cache", metavar="<cache file>", help="solution cache shared by every worker")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(
+            SolverServer(args.workers, args.max_queue, args.timeout, args.db, args.cache),
+            args.host,
+            args.port,
+            args.unix
+        ))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import unittest
+from hrd import SearchBudget
+from hrd_batch import collect_puzzles, run_batch, solve_puzzle
+
+
+TEST_PUZZLE = "test_puzzle.txt"
+
+ONE_MOVE_PUZZLE = """2773
+2663
+4115
+4115
+7007
+"""
+
+
+def write_puzzle(dir_name: str, name: str, content: str = ONE_MOVE_PUZZLE) -> str:
+    file_name = os.path.join(dir_name, name)
+    with open(file_name, mode='w') as f:
+        f.write(content)
+    return file_name
+
+
+class TestCollectPuzzles(unittest.TestCase):
+    def test_directory_glob_and_manifest_sources(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            a = write_puzzle(tmp_dir, "a.txt")
+            b = write_puzzle(tmp_dir, "b.txt")
+            manifest = write_puzzle(tmp_dir, "puzzles.lst", "# comment\na.txt\n\n")
+
+            self.assertEqual([a, b, manifest], collect_puzzles([tmp_dir]))
+            self.assertEqual([a, b], collect_puzzles([os.path.join(tmp_dir, "*.txt")]))
+            self.assertEqual([a], collect_puzzles([], manifest))
+
+
+class TestSolvePuzzle(unittest.TestCase):
+    def test_returns_cost_and_path_per_algorithm(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            puzzle = write_puzzle(tmp_dir, "one_move.txt")
+
+            result = solve_puzzle(puzzle, ["dfs", "a_star"])
+
+        self.assertEqual(puzzle, result["puzzle"])
+        self.assertEqual(1, result["solutions"]["a_star"]["cost"])
+        self.assertEqual(
+            ["3443", "3223", "3003", "3113", "4114"],
+            result["solutions"]["a_star"]["path"][-1]
+        )
+        self.assertIn("dfs", result["solutions"])
+
+    def test_writes_paths_to_output_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            puzzle = write_puzzle(tmp_dir, "one_move.txt")
+
+            result = solve_puzzle(puzzle, ["a_star"], output_dir=tmp_dir)
+
+            with open(os.path.join(tmp_dir, "one_move.a_star.txt")) as f:
+                self.assertEqual("Cost of the solution: 1", f.readline().strip())
+        self.assertNotIn("path", result["solutions"]["a_star"])
+
+    def test_budget_exceeded_is_recorded_per_algorithm(self):
+        result = solve_puzzle(TEST_PUZZLE, ["a_star", "bidirectional"], budget=SearchBudget(expansions=10))
+
+        for algorithm in ["a_star", "bidirectional"]:
+            solution = result["solutions"][algorithm]
+            self.assertIsNone(solution["cost"])
+            self.assertEqual("expanded 10 states", solution["budget_exceeded"])
+            self.assertEqual(10, solution["stats"]["expanded"])
+
+    def test_cache_answers_repeated_puzzles(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_filename = os.path.join(tmp_dir, "cache.db")
+
+            first = solve_puzzle(TEST_PUZZLE, ["a_star"], cache_filename=cache_filename)
+            second = solve_puzzle(TEST_PUZZLE, ["a_star"], cache_filename=cache_filename)
+
+        self.assertNotIn("cached", first["solutions"]["a_star"])
+        self.assertTrue(second["solutions"]["a_star"]["cached"])
+        for field in ["cost", "path"]:
+            self.assertEqual(first["solutions"]["a_star"][field], second["solutions"]["a_star"][field])
+
+    def test_unreadable_puzzle_reports_error(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            puzzle = write_puzzle(tmp_dir, "bad.txt", "21x3\n")
+
+            result = solve_puzzle(puzzle, ["a_star"])
+
+        self.assertIn("error", result)
+
+
+class TestRunBatch(unittest.TestCase):
+    def test_streams_results_to_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            puzzles = [write_puzzle(tmp_dir, f"{i}.txt") for i in range(3)]
+            puzzles.append(os.path.abspath(TEST_PUZZLE))
+            jsonl = os.path.join(tmp_dir, "results.jsonl")
+
+            results = run_batch(
+                puzzles, ["bidirectional"], workers=2, chunksize=2, jsonl_filename=jsonl
+            )
+
+            with open(jsonl) as f:
+                lines = [json.loads(line) for line in f.readlines()]
+
+        self.assertEqual(results, lines)
+        self.assertEqual(puzzles, [line["puzzle"] for line in lines])
+        self.assertEqual(
+            [1, 1, 1, 116], [line["solutions"]["bidirectional"]["cost"] for line in lines]
+        )
+
+    def test_bad_board_does_not_stop_the_batch(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            puzzles = [
+                write_puzzle(tmp_dir, "stray.txt", ONE_MOVE_PUZZLE.replace("7007", "7002")),
+                write_puzzle(tmp_dir, "six_rows.txt", ONE_MOVE_PUZZLE + "7007\n"),
+                write_puzzle(tmp_dir, "one_move.txt")
+            ]
+
+            results = run_batch(puzzles, ["a_star"], workers=1)
+
+        self.assertIn("no piece covers", results[0]["error"])
+        self.assertIn("rows", results[1]["error"])
+        self.assertEqual(1, results[2]["solutions"]["a_star"]["cost"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from hrd import Beam, State
+
+
+def create_state(cost: int, hval: int = 0) -> State:
+    state = State([])
+    state.cost = cost
+    state.hval = hval
+    return state
+
+
+class TestBeam(unittest.TestCase):
+
+    def test_remove_single_item_beam_returns_item(self):
+        sut = Beam(1)
+        state = create_state(0)
+        sut.add(state)
+
+        self.assertIs(state, sut.remove())
+        self.assertTrue(sut.is_empty())
+
+    def test_layer_keeps_width_lowest_heuristics(self):
+        sut = Beam(3)
+        for hval in [5, 1, 6, 10, 2, 4, 3]:
+            sut.add(create_state(1, hval))
+
+        hvals = []
+        while not sut.is_empty():
+            hvals.append(sut.remove().hval)
+
+        self.assertEqual([1, 2, 3], hvals)
+
+    def test_states_added_during_a_layer_wait_for_the_next(self):
+        sut = Beam(2)
+        first = create_state(0)
+        sut.add(first)
+
+        self.assertIs(first, sut.remove())
+        second = create_state(1, 2)
+        third = create_state(1, 1)
+        sut.add(second)
+        sut.add(third)
+
+        self.assertEqual(2, sut.length())
+        self.assertIs(third, sut.remove())
+        sut.add(create_state(2))
+        self.assertIs(second, sut.remove())
+
+    def test_remove_from_empty_beam_raises(self):
+        with self.assertRaises(IndexError):
+            Beam(1).remove()
@@ -0,0 +1,99 @@
+import unittest
+from hrd import State, build_distance_database, generate_grid
+from hrd_benchmark import (
+    CLASSIC_PUZZLE,
+    compare_results,
+    load_corpus,
+    measure_solver,
+    puzzle_grid,
+    random_boards
+)
+
+
+TEST_PUZZLE = "test_puzzle.txt"
+
+ONE_MOVE_GRID = [
+    [2, 7, 7, 3],
+    [2, 6, 6, 3],
+    [4, 1, 1, 5],
+    [4, 1, 1, 5],
+    [7, 0, 0, 7]
+]
+
+
+class TestCorpus(unittest.TestCase):
+    def test_corpus_starts_with_classic_layout(self):
+        corpus = dict(load_corpus())
+
+        self.assertEqual(generate_grid(TEST_PUZZLE), corpus["heng_dao_li_ma"])
+        self.assertEqual(5, len(corpus))
+
+    def test_puzzle_grid_renders_input_format(self):
+        for _, grid in load_corpus():
+            state = State(grid)
+
+            rendered = puzzle_grid(State(key=state.id, occupied=state.occupied))
+
+            self.assertEqual(state.id, State(rendered).id)
+            self.assertEqual(5, len({symbol for row in rendered for symbol in row if 2 <= symbol <= 6}))
+
+    def test_random_boards_are_solvable_and_repeatable(self):
+        distances = build_distance_database(State(generate_grid(CLASSIC_PUZZLE)))
+
+        boards = random_boards(3, seed=7, min_moves=40)
+
+        self.assertEqual(boards, random_boards(3, seed=7, min_moves=40))
+        for _, grid in boards:
+            self.assertGreaterEqual(distances[State(grid).id], 40)
+
+
+class TestMeasureSolver(unittest.TestCase):
+    def test_records_cost_work_and_memory(self):
+        run = measure_solver("one_move", ONE_MOVE_GRID, "a_star")
+
+        self.assertEqual("27732663411541157007", run["board"])
+        self.assertEqual(1, run["cost"])
+        self.assertEqual(1, run["expanded"])
+        self.assertTrue(run["peak_frontier"] > 0)
+        self.assertTrue(run["peak_rss_kb"] > 0)
+
+    def test_every_solver_reports_expansions(self):
+        run = measure_solver("one_move", ONE_MOVE_GRID, "bidirectional")
+
+        self.assertEqual(1, run["cost"])
+        self.assertTrue(run["expanded"] > 0)
+
+    def test_hda_star_runs_its_workers(self):
+        run = measure_solver("one_move", ONE_MOVE_GRID, "hda_star")
+
+        self.assertNotIn("error", run)
+        self.assertEqual(1, run["cost"])
+        self.assertTrue(run["expanded"] > 0)
+
+    def test_timeout_is_reported_as_error(self):
+        run = measure_solver("classic", generate_grid(TEST_PUZZLE), "dfs", timeout=0)
+
+        self.assertIn("timed out", run["error"])
+
+
+class TestCompareResults(unittest.TestCase):
+    def test_flags_changed_costs(self):
+        run = {
+            "puzzle": "classic",
+            "board": "21132113466547757007",
+            "algorithm": "a_star",
+            "multi_step": False,
+            "seconds": 1.0,
+            "cost": 116,
+            "expanded": 100
+        }
+
+        lines = compare_results({"runs": [run]}, {"runs": [dict(run, seconds=0.5, cost=117)]})
+
+        self.assertEqual(1, len(lines))
+        self.assertIn("0.50x", lines[0])
+        self.assertIn("COST CHANGED 116 -> 117", lines[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from hrd import BucketQueue, State
+
+
+def create_state(cost: int, hval: int = 0) -> State:
+    state = State([])
+    state.cost = cost
+    state.hval = hval
+    return state
+
+
+class TestBucketQueue(unittest.TestCase):
+
+    def test_remove_single_item_queue_returns_item(self):
+        sut = BucketQueue()
+        state = create_state(1)
+        sut.add(state)
+
+        self.assertIs(state, sut.remove())
+        self.assertTrue(sut.is_empty())
+
+    def test_bucket_sort(self):
+        sut = BucketQueue()
+        keys = [5, 1, 6, 10, 2, 4, 3]
+        for key in keys:
+            sut.add(create_state(key))
+
+        sorted_keys = []
+        while sut.length() > 0:
+            sorted_keys.append(sut.remove().get_priority())
+
+        self.assertEqual(sorted(keys), sorted_keys)
+
+    def test_add_below_current_minimum(self):
+        sut = BucketQueue()
+        sut.add(create_state(5))
+        sut.add(create_state(7))
+        self.assertEqual(5, sut.remove().get_priority())
+
+        sut.add(create_state(2))
+
+        self.assertEqual(2, sut.remove().get_priority())
+        self.assertEqual(7, sut.remove().get_priority())
+
+    def test_ties_go_to_highest_cost(self):
+        sut = BucketQueue()
+        low = create_state(1, 4)
+        high = create_state(4, 1)
+        sut.add(high)
+        sut.add(low)
+
+        self.assertIs(high, sut.remove())
+        self.assertIs(low, sut.remove())
+
+    def test_ties_with_equal_cost_are_last_in_first_out(self):
+        sut = BucketQueue()
+        first = create_state(2, 2)
+        second = create_state(2, 2)
+        sut.add(first)
+        sut.add(second)
+
+        self.assertIs(second, sut.remove())
+        self.assertIs(first, sut.remove())
+
+    def test_remove_from_empty_queue_raises(self):
+        with self.assertRaises(IndexError):
+            BucketQueue().remove()
+
+
+if __name__ == "__main__":
+    unittest.main()
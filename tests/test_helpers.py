@@ -1,6 +1,7 @@
+import os
+import tempfile
 import unittest
 from hrd import *
-from hrd import _load_output_symbol_map
 
 
 TEST_PUZZLE = "test_puzzle.txt"
@@ -21,6 +22,16 @@ class TestGenerateGrid(unittest.TestCase):
 
         self.assertEqual(expected_grid, result)
 
+    def test_board_that_does_not_fit_raises(self):
+        for text in [
+            # a 1x2 cell without its other half
+            "2113\n2113\n4665\n4775\n7002\n",
+            # a sixth row
+            "2113\n2113\n4665\n4775\n7007\n7007\n",
+            "2113\n2113\n4665\n4775\n707\n"
+        ]:
+            self.assertRaises(ValueError, parse_grid, text)
+
 
 class TestGeneratePieces(unittest.TestCase):
     def test_generate_pieces_one_1x1_in_grid(self):
@@ -156,7 +167,6 @@ class TestManhattanDistance(unittest.TestCase):
             [9, 1, 1, 9],
             [9, 1, 1, 9]
         ]
-        _load_output_symbol_map(grid)
 
         mh_dist = manhattan_distance(State(grid))
 
@@ -170,7 +180,6 @@ class TestManhattanDistance(unittest.TestCase):
             [9, 9, 9, 9],
             [9, 9, 9, 9]
         ]
-        _load_output_symbol_map(grid)
 
         mh_dist = manhattan_distance(State(grid))
 
@@ -184,7 +193,6 @@ class TestManhattanDistance(unittest.TestCase):
             [1, 1, 9, 9],
             [9, 9, 9, 9]
         ]
-        _load_output_symbol_map(grid)
 
         mh_dist = manhattan_distance(State(grid))
 
@@ -198,7 +206,6 @@ class TestManhattanDistance(unittest.TestCase):
             [9, 9, 1, 1],
             [9, 9, 9, 9]
         ]
-        _load_output_symbol_map(grid)
 
         mh_dist = manhattan_distance(State(grid))
 
@@ -212,7 +219,6 @@ class TestManhattanDistance(unittest.TestCase):
             [9, 9, 9, 9],
             [9, 9, 9, 9]
         ]
-        _load_output_symbol_map(grid)
 
         mh_dist = manhattan_distance(State(grid))
 
@@ -226,7 +232,6 @@ class TestManhattanDistance(unittest.TestCase):
             [9, 9, 9, 9],
             [9, 9, 9, 9]
         ]
-        _load_output_symbol_map(grid)
 
         mh_dist = manhattan_distance(State(grid))
 
@@ -240,30 +245,665 @@ class TestManhattanDistance(unittest.TestCase):
             [9, 9, 9, 9],
             [9, 9, 9, 9]
         ]
-        _load_output_symbol_map(grid)
 
         mh_dist = manhattan_distance(State(grid))
 
         self.assertEqual(3, mh_dist)
 
 
-class TestLoadOutputSymbolMap(unittest.TestCase):
-    def test_symbols_mapped_correctly(self):
+class TestAdmissibleHeuristics(unittest.TestCase):
+    def classic_space(self, multi_step):
+        # exact moves to the goal of every classic state that can reach one
+        start = State(generate_grid(TEST_PUZZLE))
+        distances = build_distance_database(start, multi_step)
+        states = []
+
+        for key in distances:
+            state = State(key=key, occupied=0)
+            for cls in PIECE_CLASSES:
+                state.occupied |= state.coverage(cls)
+            states.append(state)
+
+        return start, distances, states
+
+    def test_heuristics_never_overestimate_classic_states(self):
+        for multi_step in [False, True]:
+            start, distances, states = self.classic_space(multi_step)
+
+            for name, create_heuristic in HEURISTICS.items():
+                heuristic_func = create_heuristic(start, multi_step)
+                for state in states:
+                    self.assertLessEqual(heuristic_func(state), distances[state.id], name)
+
+    def test_heuristics_are_consistent_on_classic_states(self):
+        start, _, states = self.classic_space(False)
+
+        for name, create_heuristic in HEURISTICS.items():
+            heuristic_func = create_heuristic(start, False)
+            for state in states[::10]:
+                for successor in state.get_successors():
+                    self.assertLessEqual(heuristic_func(state), heuristic_func(successor) + 1, name)
+
+    def test_pattern_database_dominates_manhattan_at_start(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        heuristic_func = pattern_database_heuristic(start)
+
+        self.assertTrue(heuristic_func(start) > manhattan_distance(start))
+
+    def test_advanced_heuristic_counts_moves_between_2x2_slides(self):
+        grid = [
+            [0, 1, 1, 0],
+            [2, 1, 1, 3],
+            [2, 4, 5, 3],
+            [7, 4, 5, 7],
+            [7, 6, 6, 7]
+        ]
+
+        # 3 slides, 2 moves between them and 1 before the 2x2 piece can move
+        self.assertEqual(6, advanced_heuristic(State(grid)))
+
+    def test_blocking_heuristic_counts_pieces_on_goal_cells(self):
+        grid = [
+            [2, 1, 1, 3],
+            [2, 1, 1, 3],
+            [4, 6, 6, 5],
+            [4, 7, 7, 5],
+            [7, 0, 0, 7]
+        ]
+
+        # 2 slides plus the 1x2 and two 1x1 pieces covering the goal cells
+        self.assertEqual(5, blocking_heuristic(State(grid)))
+
+    def test_a_star_stays_optimal_with_every_heuristic(self):
+        for name in HEURISTICS:
+            goal = solve_a_star(State(generate_grid(TEST_PUZZLE)), heuristic=name)
+
+            self.assertEqual(116, recreate_start_to_goal_path(goal)[0], name)
+
+
+class TestCachedHeuristic(unittest.TestCase):
+    def test_repeated_boards_are_evaluated_once(self):
+        calls = []
+
+        def heuristic(state):
+            calls.append(state.id)
+            return manhattan_distance(state)
+
+        start = State(generate_grid(TEST_PUZZLE))
+        cached = CachedHeuristic(heuristic)
+
+        self.assertEqual(manhattan_distance(start), cached(start))
+        self.assertEqual(manhattan_distance(start), cached(State(generate_grid(TEST_PUZZLE))))
+        self.assertEqual(1, len(calls))
+        self.assertEqual((1, 1), (cached.hits, cached.misses))
+
+    def test_least_recently_used_board_is_evicted(self):
+        first, second, third = State(generate_grid(TEST_PUZZLE)).get_successors()[:3]
+        cached = CachedHeuristic(manhattan_distance, max_size=2)
+
+        cached(first)
+        cached(second)
+        cached(first)
+        cached(third)
+        cached(second)
+
+        self.assertEqual(2, len(cached))
+        self.assertEqual(1, cached.hits)
+        self.assertEqual(4, cached.misses)
+
+    def test_symmetric_cache_shares_mirrored_boards(self):
+        grid = [
+            [2, 1, 1, 0],
+            [2, 1, 1, 0],
+            [4, 6, 6, 5],
+            [4, 7, 3, 5],
+            [7, 7, 3, 7]
+        ]
+        cached = CachedHeuristic(manhattan_distance, symmetric=True)
+
+        cached(State(grid))
+        cached(State([row[::-1] for row in grid]))
+
+        self.assertEqual((1, 1), (cached.hits, cached.misses))
+
+    def test_search_with_cached_heuristic_stays_optimal(self):
+        cached = CachedHeuristic(HEURISTICS["max"](State(generate_grid(TEST_PUZZLE)), False))
+
+        goal = search(State(generate_grid(TEST_PUZZLE)), BucketQueue(), cached)
+
+        self.assertEqual(116, recreate_start_to_goal_path(goal)[0])
+        self.assertTrue(cached.hits > 0)
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_finds_optimal_solution_across_workers(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        goal = parallel_search(start, "manhattan", workers=2, batch_size=64)
+        cost, path = recreate_start_to_goal_path(goal)
+
+        self.assertEqual(116, cost)
+        self.assertIs(start, path[0])
+        self.assertTrue(is_goal_state(goal))
+
+    def test_spawned_workers_build_closure_heuristics(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        goal = parallel_search(start, "pattern", workers=2, start_method="spawn")
+
+        self.assertEqual(116, recreate_start_to_goal_path(goal)[0])
+
+    def test_unsolvable_board_returns_none(self):
+        grid = [
+            [7, 7, 7, 7],
+            [7, 7, 7, 7],
+            [7, 7, 7, 7],
+            [7, 7, 7, 7],
+            [7, 0, 0, 7]
+        ]
+
+        goal = parallel_search(State(grid), "manhattan", workers=2)
+
+        self.assertIsNone(goal)
+
+    def test_replay_path_rejects_unreachable_state(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        self.assertRaises(ValueError, replay_path, start, [start.id, start.id])
+
+
+class TestIdaStarSearch(unittest.TestCase):
+    def near_goal_state(self, moves: int) -> State:
+        goal = search(State(generate_grid(TEST_PUZZLE)), MinHeap(), manhattan_distance)
+        _, path = recreate_start_to_goal_path(goal)
+        state = path[-1 - moves]
+        return State(key=state.id, occupied=state.occupied)
+
+    def test_finds_optimal_solution_without_table(self):
+        start = self.near_goal_state(10)
+
+        goal = ida_star_search(start, manhattan_distance)
+        cost, path = recreate_start_to_goal_path(goal)
+
+        self.assertEqual(10, cost)
+        self.assertIs(start, path[0])
+        self.assertTrue(is_goal_state(goal))
+
+    def test_small_table_still_finds_optimal_solution(self):
+        for table_size in [1, 100000]:
+            start = self.near_goal_state(16)
+
+            goal = ida_star_search(start, manhattan_distance, table_size=table_size)
+
+            self.assertEqual(16, recreate_start_to_goal_path(goal)[0])
+
+    def test_exact_heuristic_solves_classic_layout(self):
+        start = State(generate_grid(TEST_PUZZLE))
+        distances = build_distance_database(start)
+
+        goal = ida_star_search(start, database_heuristic(distances), table_size=1000)
+
+        self.assertEqual(116, recreate_start_to_goal_path(goal)[0])
+
+
+class TestAnytimeSearch(unittest.TestCase):
+    def test_refines_to_optimal_solution(self):
+        for multi_step, expected in [(False, 116), (True, 81)]:
+            start = State(generate_grid(TEST_PUZZLE))
+            found = []
+
+            goal = anytime_search(
+                start,
+                pattern_database_heuristic(start, multi_step),
+                multi_step,
+                improved=lambda state, weight: found.append((state.cost, weight))
+            )
+            cost, path = recreate_start_to_goal_path(goal)
+
+            self.assertEqual(expected, cost)
+            self.assertIs(start, path[0])
+            self.assertTrue(len(found) > 1)
+            for (cost, weight), (next_cost, next_weight) in zip(found, found[1:]):
+                self.assertTrue(next_cost < cost and next_weight <= weight)
+            # every solution is within the weight of its pass of the optimal one
+            for cost, weight in found:
+                self.assertTrue(cost <= weight * expected)
+
+    def test_budget_returns_best_solution_so_far(self):
+        start = State(generate_grid(TEST_PUZZLE))
+        heuristic = pattern_database_heuristic(start)
+        stats = SearchStats()
+        first = []
+
+        anytime_search(
+            start, heuristic, improved=lambda state, weight: first.append(stats.expanded), stats=stats
+        )
+        goal = anytime_search(
+            State(generate_grid(TEST_PUZZLE)), heuristic, budget=SearchBudget(expansions=first[0] + 1)
+        )
+
+        self.assertTrue(116 < goal.cost <= 3 * 116)
+        with self.assertRaises(BudgetExceeded):
+            anytime_search(
+                State(generate_grid(TEST_PUZZLE)), heuristic, budget=SearchBudget(expansions=first[0] - 1)
+            )
+
+
+class TestBeamSearch(unittest.TestCase):
+    def test_wide_beam_solves_classic_layout(self):
+        goal = solve_beam(State(generate_grid(TEST_PUZZLE)))
+
+        self.assertEqual(116, recreate_start_to_goal_path(goal)[0])
+
+    def test_narrow_beam_stays_small(self):
+        stats = SearchStats()
+
+        goal = solve_beam(State(generate_grid(TEST_PUZZLE)), width=10, stats=stats)
 
-        generate_grid(TEST_PUZZLE)
+        self.assertTrue(recreate_start_to_goal_path(goal)[0] > 116)
+        # one layer and the successors of the next
+        self.assertTrue(stats.peak_frontier < 100)
 
-        self.assertEqual(0, output_symbol_map[0])
-        self.assertEqual(4, output_symbol_map[7])
-        self.assertEqual(1, output_symbol_map[1])
 
-        # 2x1
-        self.assertEqual(2, output_symbol_map[6])
+class TestDistanceDatabase(unittest.TestCase):
+    def test_distances_match_optimal_solution(self):
+        start = State(generate_grid(TEST_PUZZLE))
 
-        # 1x2
-        self.assertEqual(3, output_symbol_map[2])
-        self.assertEqual(3, output_symbol_map[3])
-        self.assertEqual(3, output_symbol_map[4])
-        self.assertEqual(3, output_symbol_map[5])
+        distances = build_distance_database(start)
+
+        self.assertEqual(116, distances[start.id])
+        for goal in generate_goal_states(start):
+            self.assertEqual(0, distances[goal.id])
+
+    def test_database_search_walks_down_to_goal(self):
+        start = State(generate_grid(TEST_PUZZLE))
+        distances = build_distance_database(start, multi_step=True)
+
+        goal = database_search(start, distances, multi_step=True)
+        cost, path = recreate_start_to_goal_path(goal)
+
+        self.assertEqual(81, cost)
+        self.assertIs(start, path[0])
+        self.assertTrue(is_goal_state(goal))
+
+    def test_database_search_unknown_board_returns_none(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        self.assertIsNone(database_search(start, {}))
+
+    def test_write_and_read_round_trip(self):
+        distances = {1: 0, 2 ** 70: 5, 12345: 300}
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "distances.db")
+            write_distance_database(filename, distances, multi_step=True)
+
+            with DistanceDatabase(filename) as database:
+                self.assertTrue(database.multi_step)
+                self.assertEqual(3, len(database))
+                for key, distance in distances.items():
+                    self.assertEqual(distance, database[key])
+                self.assertNotIn(2, database)
+                self.assertIsNone(database.get(2 ** 90))
+
+    def test_mapped_database_drives_search_and_heuristic(self):
+        start = State(generate_grid(TEST_PUZZLE))
+        distances = build_distance_database(start)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "distances.db")
+            write_distance_database(filename, distances)
+
+            with DistanceDatabase(filename) as database:
+                goal = database_search(start, database)
+                a_star_goal = search(
+                    State(generate_grid(TEST_PUZZLE)), MinHeap(), database_heuristic(database)
+                )
+
+        self.assertEqual(116, recreate_start_to_goal_path(goal)[0])
+        self.assertEqual(116, recreate_start_to_goal_path(a_star_goal)[0])
+
+    def test_rejects_other_files(self):
+        self.assertRaises(ValueError, DistanceDatabase, TEST_PUZZLE)
+
+
+class TestMain(unittest.TestCase):
+    def read_cost(self, filename: str) -> int:
+        with open(filename) as f:
+            return int(f.readline().split(":")[1])
+
+    def test_concurrent_writes_both_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dfs_filename = os.path.join(tmp_dir, "dfs.txt")
+            a_star_filename = os.path.join(tmp_dir, "a_star.txt")
+
+            main(TEST_PUZZLE, dfs_filename, a_star_filename, concurrent=True)
+
+            self.assertTrue(self.read_cost(dfs_filename) >= 116)
+            self.assertEqual(116, self.read_cost(a_star_filename))
+            self.assertEqual(["a_star.txt", "dfs.txt"], sorted(os.listdir(tmp_dir)))
+
+    def test_first_wins_writes_at_least_one_output(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dfs_filename = os.path.join(tmp_dir, "dfs.txt")
+            a_star_filename = os.path.join(tmp_dir, "a_star.txt")
+
+            main(TEST_PUZZLE, dfs_filename, a_star_filename, first_wins=True)
+
+            outputs = os.listdir(tmp_dir)
+            self.assertTrue(len(outputs) >= 1)
+            self.assertTrue(all(output.endswith(".txt") for output in outputs))
+
+
+class TestSearch(unittest.TestCase):
+    def test_a_star_finds_optimal_solution(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        goal = search(start, MinHeap(), manhattan_distance)
+        cost, path = recreate_start_to_goal_path(goal)
+
+        self.assertEqual(116, cost)
+        self.assertIs(start, path[0])
+        self.assertTrue(is_goal_state(path[-1]))
+
+    def test_a_star_multi_step_counts_slides_of_one_piece_as_one_move(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        goal = search(start, MinHeap(), manhattan_distance, multi_step=True)
+        cost, _ = recreate_start_to_goal_path(goal)
+
+        self.assertEqual(81, cost)
+
+    def test_a_star_with_bucket_queue_finds_optimal_solution(self):
+        for multi_step, expected in [(False, 116), (True, 81)]:
+            goal = search(State(generate_grid(TEST_PUZZLE)), BucketQueue(), manhattan_distance, multi_step)
+
+            self.assertEqual(expected, recreate_start_to_goal_path(goal)[0])
+
+    def test_duplicate_detection_keeps_optimal_cost_with_fewer_pushes(self):
+        for multi_step, expected in [(False, 116), (True, 81)]:
+            pushes = {False: 0, True: 0}
+            stats = SearchStats()
+
+            for detect_duplicates in [False, True]:
+                def heuristic(state):
+                    pushes[detect_duplicates] += 1
+                    return manhattan_distance(state)
+
+                goal = search(
+                    State(generate_grid(TEST_PUZZLE)),
+                    BucketQueue(),
+                    heuristic,
+                    multi_step,
+                    detect_duplicates=detect_duplicates,
+                    stats=stats
+                )
+
+                self.assertEqual(expected, recreate_start_to_goal_path(goal)[0])
+
+            self.assertTrue(stats.duplicates_avoided > 0)
+            self.assertTrue(pushes[True] < pushes[False])
+
+    def test_stats_count_the_work_done(self):
+        stats = SearchStats()
+
+        goal = search(State(generate_grid(TEST_PUZZLE)), Stack(), lambda s: 0, stats=stats)
+
+        self.assertIsNotNone(goal)
+        self.assertEqual(stats.peak_explored, stats.expanded)
+        self.assertTrue(stats.generated > stats.expanded)
+        self.assertTrue(stats.duplicate_pops > 0)
+        self.assertTrue(stats.peak_frontier > 0)
+        self.assertTrue(stats.seconds > 0)
+        self.assertNotIn("heuristic_seconds", stats.to_dict())
+
+    def test_timed_stats_split_time_between_parts(self):
+        stats = SearchStats(timed=True)
+
+        search(State(generate_grid(TEST_PUZZLE)), BucketQueue(), manhattan_distance, stats=stats)
+        summary = stats.to_dict()
+
+        for part in ["successor_seconds", "heuristic_seconds", "frontier_seconds"]:
+            self.assertTrue(0 < summary[part] < stats.seconds)
+        self.assertTrue(summary["nodes_per_second"] > 0)
+
+    def test_progress_is_reported_every_n_expansions(self):
+        reports = []
+        stats = SearchStats(progress_every=1000, progress=lambda s: reports.append(s.expanded))
+
+        search(State(generate_grid(TEST_PUZZLE)), BucketQueue(), manhattan_distance, stats=stats)
+
+        self.assertEqual(list(range(1000, stats.expanded + 1, 1000)), reports)
+
+    def test_budget_stops_search_with_partial_stats(self):
+        budgets = [SearchBudget(expansions=500), SearchBudget(explored=500), SearchBudget(seconds=0)]
+
+        for budget in budgets:
+            with self.assertRaises(BudgetExceeded) as raised:
+                solve_a_star(State(generate_grid(TEST_PUZZLE)), budget=budget)
+
+            self.assertEqual(500 if budget.seconds is None else 1, raised.exception.stats.expanded)
+            self.assertIn("stats", raised.exception.to_dict())
+
+    def test_budget_stops_every_solver(self):
+        for solver in sorted(SOLVERS):
+            with self.assertRaises(BudgetExceeded) as raised:
+                SOLVERS[solver](State(generate_grid(TEST_PUZZLE)), budget=SearchBudget(expansions=200))
+
+            self.assertTrue(raised.exception.stats.expanded >= 200, solver)
+
+    def test_stats_count_every_solver(self):
+        # ten moves from the goal, which every solver reaches quickly
+        _, path = recreate_start_to_goal_path(solve_a_star(State(generate_grid(TEST_PUZZLE))))
+        start = path[-11]
+
+        for solver in sorted(SOLVERS):
+            stats = SearchStats(timed=True)
+
+            goal = SOLVERS[solver](State(key=start.id, occupied=start.occupied), stats=stats)
+
+            self.assertTrue(is_goal_state(goal), solver)
+            self.assertTrue(stats.expanded > 0 and stats.seconds > 0, solver)
+            self.assertTrue(stats.timed, solver)
+
+    def test_budget_large_enough_does_not_change_solution(self):
+        stats = SearchStats()
+
+        goal = solve_a_star(State(generate_grid(TEST_PUZZLE)), stats=stats)
+        budgeted = solve_a_star(
+            State(generate_grid(TEST_PUZZLE)), budget=SearchBudget(60, stats.expanded + 1)
+        )
+
+        self.assertEqual(goal.cost, budgeted.cost)
+
+    def test_compact_paths_replay_same_solution(self):
+        for multi_step in [False, True]:
+            full_goal = search(State(generate_grid(TEST_PUZZLE)), MinHeap(), manhattan_distance, multi_step)
+            start = State(generate_grid(TEST_PUZZLE))
+
+            goal = search(start, MinHeap(), manhattan_distance, multi_step, compact=True)
+            _, full_path = recreate_start_to_goal_path(full_goal)
+            _, path = recreate_start_to_goal_path(goal)
+
+            self.assertIs(start, path[0])
+            self.assertEqual([state.id for state in full_path], [state.id for state in path])
+
+    def test_compact_dfs_replays_same_solution(self):
+        full_goal = search(State(generate_grid(TEST_PUZZLE)), Stack(), lambda s: 0)
+
+        goal = search(State(generate_grid(TEST_PUZZLE)), Stack(), lambda s: 0, compact=True)
+
+        self.assertEqual(
+            [state.id for state in recreate_start_to_goal_path(full_goal)[1]],
+            [state.id for state in recreate_start_to_goal_path(goal)[1]]
+        )
+
+
+class TestSolutionCache(unittest.TestCase):
+    def solve(self, start: State) -> State:
+        return solve_a_star(State(key=start.id, occupied=start.occupied))
+
+    def mirror(self, state: State) -> State:
+        occupied = 0
+        for index in range(BOARD_CELLS):
+            if state.occupied >> index & 1:
+                row, col = divmod(index, BOARD_COLS)
+                occupied |= 1 << (row * BOARD_COLS + BOARD_COLS - 1 - col)
+        return State(key=mirror_key(state.id), occupied=occupied)
+
+    def test_cached_solution_outlives_the_cache_object(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "cache.db")
+            with SolutionCache(filename) as cache:
+                cache.put(self.solve(State(generate_grid(TEST_PUZZLE))), "a_star")
+
+            start = State(generate_grid(TEST_PUZZLE))
+            with SolutionCache(filename) as cache:
+                goal = cache.get(start, "a_star")
+                misses = [cache.get(start, "dfs"), cache.get(start, "a_star", multi_step=True)]
+
+        cost, path = recreate_start_to_goal_path(goal)
+        self.assertEqual(116, cost)
+        self.assertIs(start, path[0])
+        self.assertTrue(is_goal_state(goal))
+        self.assertEqual([None, None], misses)
+
+    def test_boards_along_a_cached_path_and_their_mirrors_hit(self):
+        _, path = recreate_start_to_goal_path(self.solve(State(generate_grid(TEST_PUZZLE))))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with SolutionCache(os.path.join(tmp_dir, "cache.db")) as cache:
+                cache.put(path[-1], "a_star")
+
+                for step in [40, 100]:
+                    for start in [path[step], self.mirror(path[step])]:
+                        start = State(key=start.id, occupied=start.occupied)
+                        goal = cache.get(start, "a_star")
+
+                        self.assertEqual(116 - step, goal.cost)
+                        self.assertIs(start, recreate_start_to_goal_path(goal)[1][0])
+                        self.assertTrue(is_goal_state(goal))
+
+    def test_least_recently_used_solutions_are_evicted(self):
+        _, path = recreate_start_to_goal_path(self.solve(State(generate_grid(TEST_PUZZLE))))
+        # 117, 57 and 27 states from start to goal
+        starts = [path[step] for step in [0, 60, 90]]
+
+        def fresh(state: State) -> State:
+            return State(key=state.id, occupied=state.occupied)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with SolutionCache(os.path.join(tmp_dir, "cache.db"), max_states=150) as cache:
+                cache.put(self.solve(starts[2]), "first")
+                cache.put(self.solve(starts[1]), "second")
+                cache.get(fresh(starts[2]), "first")
+                cache.put(self.solve(starts[0]), "third")
+
+                self.assertIsNone(cache.get(fresh(starts[1]), "second"))
+                self.assertIsNotNone(cache.get(fresh(starts[2]), "first"))
+                self.assertIsNotNone(cache.get(fresh(starts[0]), "third"))
+                self.assertEqual(2, len(cache))
+
+
+    def test_solve_with_cache_only_skips_budgeted_anytime_runs(self):
+        _, path = recreate_start_to_goal_path(self.solve(State(generate_grid(TEST_PUZZLE))))
+        start = path[-11]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "cache.db")
+
+            for solver in ["a_star", "anytime"]:
+                first = solve_with_cache(
+                    State(key=start.id, occupied=start.occupied), solver,
+                    budget=SearchBudget(seconds=60), cache_filename=filename
+                )
+                second = solve_with_cache(
+                    State(key=start.id, occupied=start.occupied), solver, cache_filename=filename
+                )
+
+                self.assertFalse(first[1], solver)
+                self.assertEqual(solver == "a_star", second[1], solver)
+                self.assertEqual(10, recreate_start_to_goal_path(second[0])[0], solver)
+
+class TestSymmetry(unittest.TestCase):
+    def test_mirror_key_flips_board_left_to_right(self):
+        grid = [
+            [2, 1, 1, 0],
+            [2, 1, 1, 0],
+            [4, 6, 6, 5],
+            [4, 7, 3, 5],
+            [7, 7, 3, 7]
+        ]
+        state = State(grid)
+
+        mirrored = State(key=mirror_key(state.id), occupied=state.occupied)
+
+        self.assertEqual([row[::-1] for row in state.to_grid()], mirrored.to_grid())
+        self.assertEqual(state.id, mirror_key(mirror_key(state.id)))
+
+    def test_canonical_key_is_shared_by_mirrored_boards(self):
+        grid = [
+            [2, 1, 1, 0],
+            [2, 1, 1, 0],
+            [4, 6, 6, 5],
+            [4, 7, 3, 5],
+            [7, 7, 3, 7]
+        ]
+        mirrored_grid = [row[::-1] for row in grid]
+
+        self.assertEqual(
+            canonical_key(State(grid).id), canonical_key(State(mirrored_grid).id)
+        )
+
+    def test_symmetric_search_returns_real_moves_from_start(self):
+        for multi_step, expected in [(False, 116), (True, 81)]:
+            for compact in [False, True]:
+                start = State(generate_grid(TEST_PUZZLE))
+
+                goal = search(
+                    start,
+                    BucketQueue(),
+                    manhattan_distance,
+                    multi_step,
+                    compact=compact,
+                    detect_duplicates=True,
+                    symmetric=True
+                )
+                cost, path = recreate_start_to_goal_path(goal)
+
+                self.assertEqual(expected, cost)
+                self.assertIs(start, path[0])
+                for state, next_state in zip(path, path[1:]):
+                    self.assertIn(
+                        next_state.id,
+                        [successor.id for successor in state.get_successors(multi_step)]
+                    )
+
+
+class TestBidirectionalSearch(unittest.TestCase):
+    def test_generate_goal_states_places_2x2_above_exit(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        goals = generate_goal_states(start)
+
+        self.assertTrue(len(goals) > 0)
+        self.assertEqual(len(goals), len({goal.id for goal in goals}))
+        for goal in goals:
+            self.assertTrue(is_goal_state(goal))
+            self.assertEqual(2, sum(row.count(0) for row in goal.to_grid()))
+
+    def test_finds_path_as_short_as_a_star(self):
+        start = State(generate_grid(TEST_PUZZLE))
+
+        goal = bidirectional_search(start)
+        cost, path = recreate_start_to_goal_path(goal)
+
+        self.assertEqual(116, cost)
+        self.assertIs(start, path[0])
+        self.assertTrue(is_goal_state(path[-1]))
+        for state, next_state in zip(path, path[1:]):
+            self.assertIn(next_state.id, [s.id for s in state.get_successors()])
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 from typing import *
 import unittest
-from hrd import Grid, Piece
+from hrd import Grid, Piece, PieceClass, cell_mask, get_move_table, grid_occupancy
 
 
 def grid_diff(grid1: Grid, grid2: Grid) -> List[Tuple[int, int]]:
@@ -342,5 +342,46 @@ class Test2x2Piece(unittest.TestCase):
             self.assertEqual(expected, successors[0])
 
 
+class TestGetBoardMoves(unittest.TestCase):
+    def test_get_board_moves_returns_shifted_masks(self):
+        initial_state = [
+            [9, 0, 9, 9],
+            [0, 1, 1, 9],
+            [9, 9, 9, 9],
+            [9, 9, 9, 9],
+            [9, 9, 9, 9]
+        ]
+        sut = Piece(rows=1, cols=2, row=1, col=1, symbol=1)
+
+        moves = sut.get_board_moves(grid_occupancy(initial_state))
+
+        self.assertEqual([cell_mask(1, 2, 1, 0)], moves)
+
+
+class TestMoveTable(unittest.TestCase):
+    def test_move_down_requires_cells_below_piece(self):
+        table = get_move_table()
+
+        new_index, new_mask, entering, changed, _ = table[PieceClass.TwoByTwo][1][1]
+
+        self.assertEqual(5, new_index)
+        self.assertEqual(cell_mask(2, 2, 1, 1), new_mask)
+        self.assertEqual(cell_mask(1, 2, 2, 1), entering)
+        self.assertEqual(cell_mask(1, 2, 0, 1) | cell_mask(1, 2, 2, 1), changed)
+
+    def test_moves_off_the_board_are_missing(self):
+        table = get_move_table()
+
+        up, _, left, right = table[PieceClass.Horizontal][2]
+
+        self.assertIsNone(up)
+        self.assertIsNotNone(left)
+        self.assertIsNone(right)
+
+    def test_tables_are_built_per_board_size(self):
+        self.assertIsNot(get_move_table(), get_move_table(3, 3))
+        self.assertIs(get_move_table(3, 3), get_move_table(3, 3))
+
+
 if __name__ == "__main__":
     unittest.main()
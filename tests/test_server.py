@@ -0,0 +1,126 @@
+import asyncio
+import json
+import unittest
+from typing import *
+from hrd_server import SolverServer
+
+
+TEST_PUZZLE = "test_puzzle.txt"
+
+ONE_MOVE_PUZZLE = """2773
+2663
+4115
+4115
+7007
+"""
+
+
+async def request(
+    port: int, method: str, target: str, body: str = ""
+) -> Tuple[int, Dict[str, Any]]:
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n{body}".encode()
+    )
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+class TestSolverServer(unittest.TestCase):
+
+    def serve(self, test: Callable[[int], Awaitable[None]], **options) -> None:
+
+        async def run() -> None:
+            solver_server = SolverServer(workers=1, **options)
+            await solver_server.start()
+            server = await asyncio.start_server(solver_server.handle, "127.0.0.1", 0)
+            try:
+                async with server:
+                    await test(server.sockets[0].getsockname()[1])
+            finally:
+                solver_server.close()
+
+        asyncio.run(run())
+
+    def test_solves_posted_board(self):
+        async def test(port: int) -> None:
+            status, result = await request(port, "POST", "/solve?multi_step=1", ONE_MOVE_PUZZLE)
+
+            self.assertEqual(200, status)
+            self.assertEqual(1, result["cost"])
+            self.assertTrue(result["multi_step"])
+            self.assertEqual(["3443", "3223", "3003", "3113", "4114"], result["path"][-1])
+
+        self.serve(test)
+
+    def test_rejects_bad_requests(self):
+        async def test(port: int) -> None:
+            for method, target, body, expected in [
+                ("POST", "/solve", "21x3\n", 400),
+                ("POST", "/solve", "2773\n2663\n", 400),
+                ("POST", "/solve", ONE_MOVE_PUZZLE.replace("7007", "7002"), 400),
+                ("POST", "/solve?algorithm=bogo", ONE_MOVE_PUZZLE, 400),
+                ("POST", "/solve?algorithm=dfs&heuristic=pattern", ONE_MOVE_PUZZLE, 400),
+                ("GET", "/solve", "", 405),
+                ("GET", "/solutions", "", 404),
+            ]:
+                status, result = await request(port, method, target, body)
+
+                self.assertEqual(expected, status)
+                self.assertIn("error", result)
+
+        self.serve(test)
+
+    def test_timeout_stops_search(self):
+        async def test(port: int) -> None:
+            with open(TEST_PUZZLE) as f:
+                board = f.read()
+
+            status, result = await request(port, "POST", "/solve?timeout=0.01", board)
+
+            self.assertEqual(504, status)
+            self.assertIsNone(result["cost"])
+            self.assertIn("budget_exceeded", result)
+
+        self.serve(test)
+
+    def test_timeout_frees_the_worker_whatever_the_solver(self):
+        async def test(port: int) -> None:
+            with open(TEST_PUZZLE) as f:
+                board = f.read()
+
+            for algorithm in ["ida_star", "bidirectional", "hda_star"]:
+                status, result = await request(
+                    port, "POST", f"/solve?algorithm={algorithm}&timeout=0.01", board
+                )
+                self.assertEqual(504, status, algorithm)
+                self.assertIn("budget_exceeded", result)
+
+                status, result = await asyncio.wait_for(
+                    request(port, "POST", "/solve", ONE_MOVE_PUZZLE), 5
+                )
+                self.assertEqual(200, status, algorithm)
+
+        self.serve(test)
+
+    def test_full_queue_refuses_requests(self):
+        async def test(port: int) -> None:
+            with open(TEST_PUZZLE) as f:
+                board = f.read()
+
+            busy = asyncio.create_task(request(port, "POST", "/solve", board))
+            await asyncio.sleep(0.1)
+            status, result = await request(port, "POST", "/solve", ONE_MOVE_PUZZLE)
+            health = await request(port, "GET", "/health")
+
+            self.assertEqual(503, status)
+            self.assertEqual(1, health[1]["running"])
+            self.assertEqual(200, (await busy)[0])
+
+        self.serve(test, max_queue=0)
@@ -1,5 +1,5 @@
 import unittest
-from hrd import State, _load_output_symbol_map
+from hrd import PIECE_CLASSES, Piece, PieceClass, State
 
 
 class TestState(unittest.TestCase): 
@@ -12,7 +12,6 @@ class TestState(unittest.TestCase):
             [4, 7, 7, 5],
             [7, 0, 0, 7]
         ]
-        _load_output_symbol_map(puzzle5_config_grid)
 
         # Act
         state1 = State(
@@ -37,6 +36,133 @@ class TestState(unittest.TestCase):
         # Assert
         self.assertEqual(state1.id, state2.id)
 
+    def test_to_grid_renders_output_symbols(self):
+        state = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [7, 0, 0, 7]
+            ]
+        )
+
+        grid = state.to_grid()
+
+        self.assertEqual(
+            [
+                [3, 1, 1, 3],
+                [3, 1, 1, 3],
+                [3, 2, 2, 3],
+                [3, 4, 4, 3],
+                [4, 0, 0, 4]
+            ],
+            grid
+        )
+
+    def test_get_successors_moves_pieces_into_empty_cells(self):
+        state = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [7, 0, 0, 7]
+            ]
+        )
+
+        successors = state.get_successors()
+
+        self.assertEqual(4, len(successors))
+        for successor in successors:
+            self.assertIs(state, successor.parent)
+            self.assertEqual(2, sum(row.count(PieceClass.EMPTY) for row in successor.to_grid()))
+
+    def test_get_successors_updates_id_incrementally(self):
+        state = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [7, 0, 0, 7]
+            ]
+        )
+        expected = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [0, 7, 0, 7]
+            ]
+        )
+
+        ids = [successor.id for successor in state.get_successors()]
+
+        self.assertIn(expected.id, ids)
+
+    def test_get_successors_moves_only_one_piece(self):
+        state = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [7, 0, 0, 7]
+            ]
+        )
+
+        for successor in state.get_successors():
+            moved = [cls for cls in PIECE_CLASSES if successor.anchors(cls) != state.anchors(cls)]
+            before = state.anchors(moved[0])
+            after = successor.anchors(moved[0])
+
+            self.assertEqual(1, len(moved))
+            self.assertEqual(1, bin(before & ~after).count("1"))
+            self.assertEqual(1, bin(after & ~before).count("1"))
+
+    def test_get_successors_multi_step_slides_same_piece_twice(self):
+        state = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [7, 0, 0, 7]
+            ]
+        )
+        expected = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [0, 0, 7, 7]
+            ]
+        )
+
+        successors = state.get_successors(multi_step=True)
+
+        self.assertEqual(8, len(successors))
+        self.assertEqual(8, len({successor.id for successor in successors}))
+        self.assertIn(expected.id, [successor.id for successor in successors])
+
+    def test_states_and_pieces_have_no_instance_dict(self):
+        state = State(
+            [
+                [2, 1, 1, 3],
+                [2, 1, 1, 3],
+                [4, 6, 6, 5],
+                [4, 7, 7, 5],
+                [7, 0, 0, 7]
+            ]
+        )
+
+        self.assertFalse(hasattr(state, "__dict__"))
+        self.assertFalse(hasattr(state.get_successors()[0], "__dict__"))
+        self.assertFalse(hasattr(Piece(2, 2, 0, 1, 1), "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()